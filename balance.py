@@ -0,0 +1,216 @@
+# Battle Tanks — Monte Carlo balancing runner
+# Fans headless matches over a grid of tank_sim constants and level settings
+# out to a process pool and reports win rate, boss time-to-kill and
+# hits-taken distributions for every grid point. Matches are independent, so
+# throughput scales with cores.
+#
+#   python balance.py --param FB_HP=15,20,30 --param MB1_SPEED_BASE=0.6,0.9 \
+#       --matches 200 --policy random [--workers N] [--json out.json]
+#   python balance.py --param level.enemy_fire_cd_ms=1200,1800 --param level3.spawn_speed=0.45,0.7
+import argparse, ast, functools, inspect, itertools, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import tank_sim
+from levels import load_levels
+
+BOSSES = ("miniboss1", "miniboss2", "miniboss3", "final_boss")
+# Level fields a --param can set: level.FIELD (every level) or levelN.FIELD (level N only).
+# spawn_speed sets the speed of every enemy the level spawns.
+LEVEL_FIELDS = ("enemy_fire_cd_ms", "spawn_speed", "player_fire_cd_ms", "player_bullet_size",
+                "boss_after_kills", "banner_ms")
+
+# ---------- Worker side ----------
+_DEFAULTS = {}
+
+def _apply_overrides(overrides):
+    """Set tank_sim constants for this match, restoring anything an earlier task changed."""
+    for name, value in _DEFAULTS.items():
+        setattr(tank_sim, name, value)
+    for name, value in overrides.items():
+        if "." in name:
+            continue
+        _DEFAULTS.setdefault(name, getattr(tank_sim, name))
+        setattr(tank_sim, name, value)
+
+def _level_overrides(overrides):
+    """The default levels with this match's level.FIELD / levelN.FIELD values set; None if it has none."""
+    fields = [(name.split("."), value) for name, value in overrides.items() if "." in name]
+    if not fields:
+        return None
+    levels = load_levels()          # compiled fresh, so nothing carries over between matches
+    for (which, field), value in fields:
+        for i, lv in enumerate(levels, 1):
+            if which in ("level", f"level{i}"):
+                setattr(lv, field, np.full_like(lv.spawn_speed, value) if field == "spawn_speed" else value)
+    return levels
+
+class _BossTimer:
+    """Observer: sim time from each boss appearing to it being killed."""
+
+    def __init__(self):
+        self.spawned = {}
+        self.ttk = {}
+
+    def __call__(self, world):
+        for name in BOSSES:
+            boss = getattr(world, name)
+            if boss is not None:
+                self.spawned.setdefault(name, world.time_ms)
+            elif name in self.spawned and name not in self.ttk:
+                self.ttk[name] = world.time_ms - self.spawned[name]
+
+def _run_match(task):
+    overrides, seed, policy, ticks, tick_hz = task
+    _apply_overrides(overrides)
+    timer = _BossTimer()
+    r = tank_sim.run_headless(ticks, seed=seed, tick_hz=tick_hz, policy=tank_sim.POLICIES[policy], observer=timer,
+                              levels=_level_overrides(overrides))
+    return dict(won=r["won"], lost=r["lost"], level=r["level"], hits=r["hits_taken"],
+                sim_ms=r["sim_ms"], ticks=r["ticks"], ttk=timer.ttk)
+
+# ---------- Driver side ----------
+def _parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"not a number: {text!r}")
+
+@functools.lru_cache(maxsize=None)
+def bound_at_import():
+    """{constant: what reads it} for tank_sim constants that are read when tank_sim is imported.
+
+    Module-level assignments, class attributes and default arguments are
+    evaluated once, so overriding a constant one of them reads would only
+    half apply (e.g. GRID_LENGTH moves the walls but not BULLET_WALL_LIMIT).
+    """
+    uses = {}
+
+    def note(expr, user):
+        for n in ast.walk(expr):
+            if isinstance(n, ast.Name) and n.id.isupper() and not n.id.startswith("_"):
+                uses.setdefault(n.id, user)
+
+    def scan(body, scope):
+        for node in body:
+            if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                user = ", ".join(scope + ast.unparse(t) for t in targets)
+                if node.value is not None:
+                    note(node.value, user)
+                for t in targets:
+                    if isinstance(t, ast.Subscript):
+                        note(t.slice, user)
+            elif isinstance(node, ast.FunctionDef):
+                args = node.args.posonlyargs + node.args.args
+                for a, d in zip(args[len(args) - len(node.args.defaults):], node.args.defaults):
+                    note(d, f"the default {a.arg} of {scope}{node.name}()")
+                for a, d in zip(node.args.kwonlyargs, node.args.kw_defaults):
+                    if d is not None:
+                        note(d, f"the default {a.arg} of {scope}{node.name}()")
+            elif isinstance(node, ast.ClassDef):
+                scan(node.body, scope + node.name + ".")
+
+    scan(ast.parse(inspect.getsource(tank_sim)).body, "")
+    return uses
+
+def parse_param(spec):
+    """'NAME=v1,v2,...' -> (NAME, [v1, v2, ...]).
+
+    NAME is a tank_sim constant, or level.FIELD / levelN.FIELD for a field
+    in LEVEL_FIELDS of every level / of level N of the default level set.
+    """
+    name, sep, values = spec.partition("=")
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=v1,v2,... got {spec!r}")
+    if "." in name:
+        which, _, field = name.partition(".")
+        n = which[len("level"):]
+        if not which.startswith("level") or (n and not (n.isdigit() and 1 <= int(n) <= len(load_levels()))):
+            raise argparse.ArgumentTypeError(f"unknown level {which!r} (level or level1..level{len(load_levels())})")
+        if field not in LEVEL_FIELDS:
+            raise argparse.ArgumentTypeError(f"unknown level field {field!r} (one of {', '.join(LEVEL_FIELDS)})")
+    elif not name.isupper() or name.startswith("_") or not hasattr(tank_sim, name):
+        raise argparse.ArgumentTypeError(f"unknown tank_sim constant {name!r} (level settings are level.FIELD)")
+    elif name in bound_at_import():
+        raise argparse.ArgumentTypeError(f"{name} is read once when tank_sim is imported (by {bound_at_import()[name]}), "
+                                         f"so overriding it would only half apply")
+    return name, [_parse_value(v) for v in values.split(",")]
+
+def grid_points(params):
+    """Cartesian product of [(name, values)] as a list of override dicts."""
+    names = [n for n, _ in params]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(v for _, v in params))] or [{}]
+
+def _dist(values):
+    if not values:
+        return None
+    a = np.asarray(values, dtype=float)
+    p10, p50, p90 = np.percentile(a, [10, 50, 90])
+    return dict(n=len(a), mean=float(a.mean()), p10=float(p10), p50=float(p50), p90=float(p90))
+
+def summarize(results):
+    """Aggregate one grid point's match results."""
+    n = len(results)
+    hits = np.bincount([r["hits"] for r in results], minlength=tank_sim.PLAYER_MAX_HITS + 1)
+    return dict(
+        matches=n,
+        win_rate=sum(r["won"] for r in results) / n,
+        loss_rate=sum(r["lost"] for r in results) / n,
+        level_mean=float(np.mean([r["level"] for r in results])),
+        match_ms=_dist([r["sim_ms"] for r in results]),
+        ttk_ms={b: _dist([r["ttk"][b] for r in results if b in r["ttk"]]) for b in BOSSES},
+        hits_hist=hits.tolist(),
+    )
+
+def run_grid(points, matches, policy="aim", seed=0, ticks=60 * 60 * 10, tick_hz=tank_sim.TICK_HZ, workers=None):
+    """Run `matches` seeded matches per grid point; returns [(overrides, summary)].
+
+    Match k of every point uses seed + k, so points are compared on the same
+    seeds. workers=1 runs in-process (no pool).
+    """
+    tasks = [(pt, seed + k, policy, ticks, tick_hz) for pt in points for k in range(matches)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = list(map(_run_match, tasks))
+        _apply_overrides({})
+    else:
+        # whole matches per task; a few chunks per worker keeps IPC negligible and the tail short
+        chunk = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_match, tasks, chunksize=chunk))
+    return [(pt, summarize(results[i * matches:(i + 1) * matches])) for i, pt in enumerate(points)]
+
+def _fmt_ttk(d):
+    return "-" if d is None else f"{d['p50'] / 1000:.1f}s"
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Monte Carlo balancing over tank_sim constants and level settings")
+    ap.add_argument("--param", type=parse_param, action="append", default=[], metavar="NAME=v1,v2",
+                    help="constant (or level.FIELD / levelN.FIELD) to sweep (repeatable; the grid is their cartesian product)")
+    ap.add_argument("--matches", type=int, default=50, help="matches per grid point")
+    ap.add_argument("--policy", choices=sorted(tank_sim.POLICIES), default="aim")
+    ap.add_argument("--seed", type=int, default=0, help="seed of the first match")
+    ap.add_argument("--ticks", type=int, default=60 * 60 * 10, help="tick cap per match")
+    ap.add_argument("--hz", type=float, default=tank_sim.TICK_HZ)
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    ap.add_argument("--json", help="write the full summaries here")
+    args = ap.parse_args(argv)
+    points = grid_points(args.param)
+    t0 = time.perf_counter()
+    rows = run_grid(points, args.matches, args.policy, args.seed, args.ticks, args.hz, args.workers)
+    wall = time.perf_counter() - t0
+    total = len(points) * args.matches
+    print(f"{total} matches, {len(points)} grid points, {wall:.1f}s ({total / wall:.1f} matches/s)")
+    for pt, s in rows:
+        label = " ".join(f"{k}={v}" for k, v in pt.items()) or "(defaults)"
+        ttk = " ".join(f"{b}={_fmt_ttk(s['ttk_ms'][b])}" for b in BOSSES)
+        print(f"{label}: win={s['win_rate']:.2f} level={s['level_mean']:.2f} ttk50[{ttk}] hits={s['hits_hist']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([dict(params=pt, **s) for pt, s in rows], f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# Battle Tanks — beam weapons (lasers)
+# Every active beam lives in one set of NumPy columns, like the projectile
+# store. A beam runs from its origin to the arena wall and may spin; hit tests
+# cover the whole fan it swept during the tick, for all beams x all targets at
+# once.
+import struct
+import numpy as np
+from geometry import point_segment_dist2_np, ray_box_exit
+
+class BeamStore:
+    """Origin, angle, spin, hit radius and owner for all live beams.
+
+    `spin` is degrees per 16 ms frame. `update` remembers the start-of-tick
+    pose (x0, y0, ang0, ex0, ey0) and the signed angle swept this tick, and
+    re-clips every beam to the walls of the [-half_extent, half_extent]^2
+    arena (ex, ey).
+    """
+
+    def __init__(self, half_extent, capacity=8):
+        self.half = float(half_extent)
+        self.n = 0
+        self._alloc(capacity)
+
+    def _alloc(self, cap):
+        self._x = np.zeros(cap)
+        self._y = np.zeros(cap)
+        self._ang = np.zeros(cap)
+        self._x0 = np.zeros(cap)
+        self._y0 = np.zeros(cap)
+        self._ang0 = np.zeros(cap)
+        self._sweep = np.zeros(cap)
+        self._spin = np.zeros(cap)
+        self._hit_r = np.zeros(cap)
+        self._ex = np.zeros(cap)
+        self._ey = np.zeros(cap)
+        self._ex0 = np.zeros(cap)
+        self._ey0 = np.zeros(cap)
+        self._owner = np.zeros(cap, dtype=np.int8)
+
+    def _columns(self):
+        return (self._x, self._y, self._ang, self._x0, self._y0, self._ang0, self._sweep,
+                self._spin, self._hit_r, self._ex, self._ey, self._ex0, self._ey0, self._owner)
+
+    def _grow(self):
+        old = self._columns()
+        n = self.n
+        self._alloc(max(8, len(self._x) * 2))
+        for dst, src in zip(self._columns(), old):
+            dst[:n] = src[:n]
+
+    # ---------- Views over live rows ----------
+    @property
+    def x(self):
+        return self._x[:self.n]
+
+    @property
+    def y(self):
+        return self._y[:self.n]
+
+    @property
+    def ang(self):
+        return self._ang[:self.n]
+
+    @property
+    def ex(self):
+        return self._ex[:self.n]
+
+    @property
+    def ey(self):
+        return self._ey[:self.n]
+
+    @property
+    def hit_r(self):
+        return self._hit_r[:self.n]
+
+    @property
+    def owner(self):
+        return self._owner[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    # ---------- Spawn / remove ----------
+    def spawn(self, x, y, ang, spin, hit_r, owner):
+        """Add a beam at (x, y) pointing at `ang` degrees. Returns its row (valid until a clear)."""
+        if self.n == len(self._x):
+            self._grow()
+        i = self.n
+        self._x[i] = self._x0[i] = x
+        self._y[i] = self._y0[i] = y
+        self._ang[i] = self._ang0[i] = ang
+        self._sweep[i] = 0.0
+        self._spin[i] = spin
+        self._hit_r[i] = hit_r
+        self._owner[i] = owner
+        ex, ey = ray_box_exit(np.array([x]), np.array([y]), np.array([ang]), self.half)
+        self._ex[i] = self._ex0[i] = ex[0]
+        self._ey[i] = self._ey0[i] = ey[0]
+        self.n = i + 1
+        return i
+
+    def clear(self, owner=None):
+        if owner is None:
+            self.n = 0
+            return
+        keep = self.owner != owner
+        m = int(np.count_nonzero(keep))
+        for col in self._columns():
+            col[:m] = col[:self.n][keep]
+        self.n = m
+
+    def move(self, i, x, y):
+        """Carry beam i's origin along with whatever fires it (clipped on the next update)."""
+        self._x[i] = x
+        self._y[i] = y
+
+    # ---------- Snapshot ----------
+    _HEAD = struct.Struct("<I")
+
+    def to_bytes(self):
+        n = self.n
+        return self._HEAD.pack(n) + b"".join(col[:n].tobytes() for col in self._columns())
+
+    def load_bytes(self, buf, pos):
+        """Replace the contents from `to_bytes` output at buf[pos:]; returns the end offset."""
+        (n,) = self._HEAD.unpack_from(buf, pos)
+        pos += self._HEAD.size
+        if n > len(self._x):
+            self._alloc(n)
+        for col in self._columns():
+            col[:n] = np.frombuffer(buf, col.dtype, n, pos)
+            pos += n * col.itemsize
+        self.n = n
+        return pos
+
+    # ---------- Update / hit tests ----------
+    def update(self, dt_ms):
+        """Spin every beam for one tick and re-clip it to the walls."""
+        n = self.n
+        if n == 0:
+            return
+        self._x0[:n] = self._x[:n]   # move() during the tick is folded into the end pose
+        self._y0[:n] = self._y[:n]
+        ang = self._ang[:n]
+        self._ang0[:n] = ang
+        self._ex0[:n] = self._ex[:n]
+        self._ey0[:n] = self._ey[:n]
+        sweep = self._spin[:n] * (dt_ms / 16.0)
+        self._sweep[:n] = sweep
+        ang += sweep
+        ang %= 360.0
+        self._ex[:n], self._ey[:n] = ray_box_exit(self.x, self.y, ang, self.half)
+
+    def hits(self, tx, ty, tr=0.0, mask=None):
+        """(beam, target) bool matrix: did beam b touch target t (radius tr) this tick.
+
+        A target is hit if it is within hit_r + tr of the beam at the start or
+        the end of the tick, or if its centre lies inside the fan the beam
+        swept between the two (every point of the fan inside the arena was
+        covered). `mask` selects beams (e.g. by owner); unselected rows are False.
+        """
+        n = self.n
+        tx = np.asarray(tx, dtype=float)[None, :]
+        ty = np.asarray(ty, dtype=float)[None, :]
+        out = np.zeros((n, tx.shape[1]), dtype=bool)
+        rows = np.arange(n) if mask is None else np.flatnonzero(mask)
+        if len(rows) == 0 or tx.shape[1] == 0:
+            return out
+        x0, y0, a0, e0x, e0y, x1, y1, e1x, e1y, r, sweep = (
+            c[rows][:, None] for c in (self._x0, self._y0, self._ang0, self._ex0, self._ey0,
+                                       self._x, self._y, self._ex, self._ey, self._hit_r, self._sweep))
+        r = r + tr
+        near0 = point_segment_dist2_np(tx, ty, x0, y0, e0x, e0y) <= r * r
+        near1 = point_segment_dist2_np(tx, ty, x1, y1, e1x, e1y) <= r * r
+        rel = np.degrees(np.arctan2(ty - y1, tx - x1)) - a0
+        rel = np.where(sweep >= 0.0, rel % 360.0, (-rel) % 360.0)
+        fan = (sweep != 0.0) & (rel <= np.abs(sweep))
+        out[rows] = near0 | near1 | fan
+        return out
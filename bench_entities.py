@@ -0,0 +1,143 @@
+# Battle Tanks — entity layout benchmark
+# Memory per entity and one steering / integration tick at 10k entities for
+# the old per-entity dicts, slotted objects (entities.py) and the array
+# stores (enemy_store.py, projectile_store.py).
+#
+#   python bench_entities.py [--n 10000]
+import argparse, math, random, time, tracemalloc
+from entities import Tank
+from enemy_store import EnemyStore
+from projectile_store import ProjectileStore, OWNER_ENEMY
+from steering import steer
+from tank_sim import EN_STANDOFF_R, STANDOFF_DEADBAND, GRID_LENGTH
+
+WIDE = 1e9   # wall limit for the bullet runs: nothing is culled, so every repeat moves all n
+
+class _SlotEnemy(Tank):
+    __slots__ = ("speed", "alive")
+
+def _make_dicts(pts):
+    return [dict(x=x, y=y, z=20.0, yaw=0.0, speed=1.0, alive=True) for x, y in pts]
+
+def _make_slots(pts):
+    out = []
+    for x, y in pts:
+        e = _SlotEnemy(x, y, 20.0, 1.0, 0.0)
+        e.speed = 1.0
+        e.alive = True
+        out.append(e)
+    return out
+
+def _make_store(pts):
+    store = EnemyStore()
+    for x, y in pts:
+        store.spawn(x, y, 20.0, 1.0, 0.0, 1.0)
+    return store
+
+def _make_bullet_dicts(pts):
+    return [dict(x=x, y=y, z=30.0, vx=7.0, vy=0.0, ttl=4200.0, size=4.5) for x, y in pts]
+
+def _make_bullet_store(pts):
+    store = ProjectileStore()
+    for x, y in pts:
+        store.spawn(x, y, 30.0, 7.0, 0.0, 4200.0, 4.5, OWNER_ENEMY)
+    return store
+
+def _bytes_per(make, pts):
+    tracemalloc.start()
+    obj = make(pts)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size / len(pts)
+
+# ---------- One tick, the pre-array way (dicts) and the same loop on slots ----------
+def _steer_dicts(es, tx, ty, f):
+    for e in es:
+        dx, dy = tx - e["x"], ty - e["y"]
+        e["yaw"] = math.degrees(math.atan2(dy, dx))
+        d = math.hypot(dx, dy)
+        step = e["speed"] * f
+        if d > EN_STANDOFF_R + STANDOFF_DEADBAND:
+            e["x"] += math.cos(math.radians(e["yaw"])) * step
+            e["y"] += math.sin(math.radians(e["yaw"])) * step
+        elif d < EN_STANDOFF_R - STANDOFF_DEADBAND:
+            e["x"] -= math.cos(math.radians(e["yaw"])) * step * 0.45
+            e["y"] -= math.sin(math.radians(e["yaw"])) * step * 0.45
+        br = GRID_LENGTH - 50
+        e["x"] = max(-br, min(br, e["x"]))
+        e["y"] = max(-br, min(br, e["y"]))
+
+def _steer_slots(es, tx, ty, f):
+    for e in es:
+        dx, dy = tx - e.x, ty - e.y
+        d = math.hypot(dx, dy)
+        if d > 0.0:
+            e.hx, e.hy = dx / d, dy / d
+        step = e.speed * f
+        if d > EN_STANDOFF_R + STANDOFF_DEADBAND:
+            e.x += e.hx * step
+            e.y += e.hy * step
+        elif d < EN_STANDOFF_R - STANDOFF_DEADBAND:
+            e.x -= e.hx * step * 0.45
+            e.y -= e.hy * step * 0.45
+        br = GRID_LENGTH - 50
+        e.x = max(-br, min(br, e.x))
+        e.y = max(-br, min(br, e.y))
+
+def _steer_store(store, tx, ty, f):
+    live = store.live()
+    x, y, hx, hy = store.x[live], store.y[live], store.hx[live], store.hy[live]
+    steer(x, y, hx, hy, store.speed[live], tx, ty, f, EN_STANDOFF_R, STANDOFF_DEADBAND, 0.45, GRID_LENGTH - 50)
+    store.x[live] = x
+    store.y[live] = y
+    store.hx[live] = hx
+    store.hy[live] = hy
+
+def _integrate_bullet_dicts(bs, f, wall):
+    keep = []
+    for b in bs:
+        b["x"] += b["vx"] * f
+        b["y"] += b["vy"] * f
+        b["ttl"] -= 16.0 * f
+        if b["ttl"] > 0 and abs(b["x"]) < wall and abs(b["y"]) < wall:
+            keep.append(b)
+    bs[:] = keep
+
+def _integrate_bullet_store(store, f, wall):
+    store.integrate(16.0 * f)
+    store.cull(wall)
+
+def _time(fn, repeat=7):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Entity layout memory / tick-time benchmark")
+    ap.add_argument("--n", type=int, default=10000)
+    args = ap.parse_args(argv)
+    rng = random.Random(0)
+    pts = [(rng.uniform(-540, 540), rng.uniform(-540, 540)) for _ in range(args.n)]
+    n = args.n
+    print(f"{n} entities")
+    print(f"{'layout':<22} {'bytes/entity':>13} {'tick ms':>9} {'ns/entity':>10}")
+    dicts, slots, store = _make_dicts(pts), _make_slots(pts), _make_store(pts)
+    for label, make, tick in (
+            ("tank dict", _make_dicts, lambda: _steer_dicts(dicts, 0.0, 0.0, 1.0)),
+            ("tank __slots__", _make_slots, lambda: _steer_slots(slots, 0.0, 0.0, 1.0)),
+            ("tank EnemyStore row", _make_store, lambda: _steer_store(store, 0.0, 0.0, 1.0))):
+        t = _time(tick)
+        print(f"{label:<22} {_bytes_per(make, pts):>13.0f} {t * 1e3:>9.2f} {t / n * 1e9:>10.0f}")
+    bdicts, bstore = _make_bullet_dicts(pts), _make_bullet_store(pts)
+    for label, make, tick in (
+            ("bullet dict", _make_bullet_dicts, lambda: _integrate_bullet_dicts(bdicts, 1.0, WIDE)),
+            ("bullet store row", _make_bullet_store, lambda: _integrate_bullet_store(bstore, 1.0, WIDE))):
+        t = _time(tick)
+        print(f"{label:<22} {_bytes_per(make, pts):>13.0f} {t * 1e3:>9.2f} {t / n * 1e9:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Battle Tanks — enemy separation benchmark
+# Times the old all-pairs loop against the grid solver as the tank count grows.
+# Tanks are scattered at constant density (arena grows with N) so the work per
+# tank stays comparable; a flat ns/tank column means linear scaling.
+#
+#   python bench_separation.py [--max 10000] [--brute-max 2000]
+import argparse, math, random, time
+import numpy as np
+from spatial_hash import SpatialHash
+from separation import separate_points
+from tank_sim import MIN_SEP
+
+SPACING = 40.0   # mean distance between tanks; a little under MIN_SEP so pairs overlap
+
+def _separate_all_pairs(xs, ys, rng):
+    """The pre-grid `_separate_enemies` loop, kept here as the reference."""
+    n = len(xs)
+    for i in range(n):
+        for j in range(i+1, n):
+            dx = xs[j] - xs[i]
+            dy = ys[j] - ys[i]
+            d2 = dx*dx + dy*dy
+            if d2 <= 1e-6:
+                push = MIN_SEP * 0.5
+                ang = rng.random() * 2.0 * math.pi
+                xs[i] -= math.cos(ang) * push
+                ys[i] -= math.sin(ang) * push
+                xs[j] += math.cos(ang) * push
+                ys[j] += math.sin(ang) * push
+                continue
+            d = math.sqrt(d2)
+            if d < MIN_SEP:
+                need = (MIN_SEP - d) * 0.5
+                nx, ny = dx / d, dy / d
+                xs[j] += nx * need
+                ys[j] += ny * need
+                xs[i] -= nx * need
+                ys[i] -= ny * need
+
+def _layout(n, seed):
+    half = max(MIN_SEP, math.sqrt(n) * SPACING * 0.5)
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-half, half, n), rng.uniform(-half, half, n), half
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Separation solver scaling benchmark")
+    ap.add_argument("--max", type=int, default=10000, help="largest tank count")
+    ap.add_argument("--brute-max", type=int, default=2000, help="skip the all-pairs loop above this")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+    sizes = [n for n in (10, 30, 100, 300, 1000, 3000, 10000, 30000) if n <= args.max]
+    print(f"{'N':>7} {'all-pairs ms':>13} {'grid ms':>9} {'grid ns/tank':>13} {'pairs/tank':>11}")
+    for n in sizes:
+        x0, y0, half = _layout(n, seed=n)
+        grid = SpatialHash(MIN_SEP, half)
+        brute_ms = "-"
+        if n <= args.brute_max:
+            def brute():
+                _separate_all_pairs(x0.tolist(), y0.tolist(), random.Random(0))
+            brute_ms = f"{_time(brute, max(1, args.repeat // 2)) * 1e3:.2f}"
+        def fast():
+            separate_points(x0.copy(), y0.copy(), MIN_SEP, random.Random(0), grid)
+        t = _time(fast, args.repeat)
+        qi, pj = grid.query_pairs(x0, y0, MIN_SEP)
+        d2 = (x0[qi] - x0[pj])**2 + (y0[qi] - y0[pj])**2
+        pairs = int(np.count_nonzero((qi < pj) & (d2 < MIN_SEP * MIN_SEP)))
+        print(f"{n:>7} {brute_ms:>13} {t * 1e3:>9.2f} {t / n * 1e9:>13.0f} {pairs / n:>11.2f}")
+
+if __name__ == "__main__":
+    main()
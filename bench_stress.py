@@ -0,0 +1,80 @@
+# Battle Tanks — stress-mode scaling benchmark
+# Runs the headless sim in stress mode (N enemies in rings, all firing) for
+# each N and logs tick time; frame time needs a window, so the game logs that
+# itself while in stress mode (see README). A second table times the
+# --sim-process handoff of each published state: snapshot, publish into shared
+# memory, take, and restore into the front end's mirror World.
+#
+#   python bench_stress.py [--max 10000] [--ticks 300]
+import argparse, time
+import numpy as np
+from tank_sim import World, ManualClock, STRESS_STEPS, OWNER_ENEMY, aim_policy
+from sim_process import StateBuffer
+
+def run(n, ticks, warmup, seed=1):
+    """Per-tick wall times (seconds) and enemies run through the AI per tick, for
+    `ticks` stress-mode ticks with `n` enemies."""
+    world = World(seed=seed, clock=ManualClock())
+    world.set_stress(n)
+    times = np.empty(ticks)
+    ai = np.empty(ticks)
+    for k in range(warmup + ticks):
+        aim_policy(world)
+        t0 = time.perf_counter()
+        world.step(world.tick_ms)
+        if k >= warmup:
+            times[k - warmup] = time.perf_counter() - t0
+            ai[k - warmup] = world.ai_updated
+    return times, ai, world
+
+def handoff(world, state, reps=20):
+    """Snapshot size (bytes) and mean ms of snapshot / publish / take / restore for `world`'s state."""
+    mirror = World(seed=world.seed, clock=ManualClock())
+    mirror.restore(world.snapshot())      # first restore builds the stress level; not timed
+    t = np.zeros(4)
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        blob = world.snapshot()
+        t1 = time.perf_counter()
+        state.publish(blob, 0.0, 0.0)
+        t2 = time.perf_counter()
+        got, _, _ = state.take()
+        t3 = time.perf_counter()
+        mirror.restore(got)
+        t4 = time.perf_counter()
+        t += (t1 - t0, t2 - t1, t3 - t2, t4 - t3)
+    return len(blob), t / reps * 1e3
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stress-mode tick time vs enemy count")
+    ap.add_argument("--max", type=int, default=10000, help="largest enemy count")
+    ap.add_argument("--ticks", type=int, default=300, help="timed ticks per N")
+    ap.add_argument("--warmup", type=int, default=120, help="untimed ticks first (enemies close in, bullets fill up)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    budget_ms = 1000.0 / 60.0
+    print(f"{'N':>6} {'tick ms':>8} {'p95 ms':>8} {'max ms':>8} {'us/enemy':>9} {'AI/tick':>8} {'bullets':>8} {'60Hz budget':>12}")
+    worlds = []
+    for n in (n for n in STRESS_STEPS if n <= args.max):
+        times, ai, world = run(n, args.ticks, args.warmup, args.seed)
+        mean = times.mean() * 1e3
+        p95 = np.percentile(times, 95) * 1e3
+        bullets = world.projectiles.count(OWNER_ENEMY)
+        print(f"{n:>6} {mean:>8.3f} {p95:>8.3f} {times.max() * 1e3:>8.3f} {mean / n * 1e3:>9.2f} "
+              f"{ai.mean():>8.0f} {bullets:>8} {mean / budget_ms:>11.0%}", flush=True)
+        worlds.append((n, world))
+    print("\n--sim-process handoff per published state (ms)")
+    print(f"{'N':>6} {'KB':>8} {'snapshot':>9} {'publish':>8} {'take':>8} {'restore':>8} {'total':>8} {'60Hz budget':>12}")
+    state = StateBuffer()
+    try:
+        for n, world in worlds:
+            size, (snap, pub, take, restore) = handoff(world, state)
+            total = snap + pub + take + restore
+            print(f"{n:>6} {size / 1024:>8.0f} {snap:>9.3f} {pub:>8.3f} {take:>8.3f} {restore:>8.3f} {total:>8.3f} "
+                  f"{total / budget_ms:>11.0%}", flush=True)
+    finally:
+        state.shm.close()
+        state.shm.unlink()
+
+if __name__ == "__main__":
+    main()
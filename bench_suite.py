@@ -0,0 +1,275 @@
+# Battle Tanks — benchmark suite: fixed seeded scenarios x simulation / render hot paths
+# Each scenario is built once, warmed up and snapshotted; every timed sample
+# restores that snapshot and times a single call, so runs measure the same
+# state every time. showScreen runs against a null GL (every GL / GLU / GLUT
+# call is a no-op), which times the Python side of a frame without a window.
+#
+#   python bench_suite.py run [--out results.json] [--scenarios level3,stress1k] [--baseline base.json]
+#   python bench_suite.py compare base.json results.json [--threshold 0.15]
+import argparse, importlib, importlib.util, json, os, platform, statistics, subprocess, sys, time, types
+import numpy as np
+import tank_sim
+from tank_sim import World, ManualClock, OWNER_FB, FB_BULLET_SPEED, FB_BULLET_TTL, aim_policy
+from levels import compile_level
+
+FORMAT = 1
+SEED = 1
+FIRE_TICKS = 20   # the player only fires in the last warm-up ticks: bullets in flight, no kills
+GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Battle Tank Game (2).py")
+
+# ---------- Scenarios ----------
+def _empty():
+    return World(seed=SEED, clock=ManualClock(), levels=(compile_level({"name": "Empty arena"}, 1),)), 60
+
+def _level3():
+    w = World(seed=SEED, clock=ManualClock())
+    w.set_level(3)
+    w.start_level_waves()
+    return w, 240
+
+def _bosses():
+    """Every boss at once (MB2 moves the player to a corner)."""
+    w = World(seed=SEED, clock=ManualClock())
+    w.enemies_basic.clear()
+    w._spawn_miniboss2()
+    w._spawn_miniboss1()
+    w._spawn_miniboss3()
+    w._spawn_final_boss()
+    return w, 120
+
+def _fb_storm(n_bullets=1500):
+    """Final boss mid-fight with a spiral of its bullets filling the arena."""
+    w = World(seed=SEED, clock=ManualClock())
+    w.set_level(4)
+    w.start_level_waves()
+    w._maybe_spawn_boss()
+    fb = w.final_boss
+    k = np.arange(n_bullets)
+    ang = k * 0.61
+    r = 60.0 + 440.0 * k / n_bullets
+    c, s = np.cos(ang), np.sin(ang)
+    w.projectiles.spawn_many(fb.x + c * r, fb.y + s * r, fb.z + tank_sim.FB_TURRET_Z,
+                             c * FB_BULLET_SPEED, s * FB_BULLET_SPEED, FB_BULLET_TTL, 6.2, OWNER_FB)
+    return w, 5
+
+def _stress(n):
+    def build():
+        w = World(seed=SEED, clock=ManualClock())
+        w.set_stress(n)
+        return w, 90
+    return build
+
+# bosses each scenario must still have after its warm-up, or their update paths go untimed
+EXPECT_BOSSES = {
+    "bosses": ("miniboss1", "miniboss2", "miniboss3", "final_boss"),
+    "fb_storm": ("final_boss",),
+}
+
+SCENARIOS = {
+    "empty": _empty,
+    "level3": _level3,
+    "bosses": _bosses,
+    "fb_storm": _fb_storm,
+    "stress1k": _stress(1000),
+    "stress10k": _stress(10000),
+}
+
+# ---------- Hot paths ----------
+# name -> (applies(world), run(world)); a path is skipped where it has nothing to do
+def _live_xy(w):
+    live = w.enemies_basic.live()
+    return w.enemies_basic.x[live].copy(), w.enemies_basic.y[live].copy()
+
+def _bosses_hit(w):
+    w._player_bullets_vs_mb1()
+    w._player_bullets_vs_mb2()
+    w._player_bullets_vs_mb3()
+    w._player_bullets_vs_final_boss()
+
+def _player_vs_enemies(w):
+    x, y = _live_xy(w)
+    w._player_bullets_vs_tanks(x, y, tank_sim.EN_HULL_W*0.35 + 4.0, lambda j: w.enemies_basic.kill(w.enemies_basic.live()[j]))
+
+def _any_boss(w):
+    return any(True for _ in w._boss_tanks())
+
+PATHS = {
+    "step": (None, lambda w: w.step(w.tick_ms)),
+    "update_projectiles": (None, lambda w: w.update_projectiles(w.tick_ms)),
+    "update_enemies_basic": (lambda w: len(w.enemies_basic), lambda w: w.update_enemies_basic(w.tick_ms)),
+    "separate_enemies": (lambda w: w.enemies_basic.alive_count() > 1, lambda w: w._separate_enemies(*_live_xy(w))),
+    "update_miniboss1": (lambda w: w.miniboss1 is not None, lambda w: w._update_miniboss1(w.tick_ms)),
+    "update_miniboss2": (lambda w: w.miniboss2 is not None, lambda w: w._update_miniboss2(w.tick_ms)),
+    "update_miniboss3": (lambda w: w.miniboss3 is not None, lambda w: w._update_miniboss3(w.tick_ms)),
+    "update_final_boss": (lambda w: w.final_boss is not None, lambda w: w._update_final_boss(w.tick_ms)),
+    "update_beams": (None, lambda w: w.update_beams(w.tick_ms)),
+    "collide_hostile_vs_player": (None, lambda w: w._hostile_bullets_vs_player()),
+    "collide_player_vs_enemies": (lambda w: w.enemies_basic.alive_count(), _player_vs_enemies),
+    "collide_player_vs_bosses": (_any_boss, _bosses_hit),
+    "show_screen": (None, None),   # filled in by _null_gl_game
+}
+
+# ---------- Null GL ----------
+def _noop(*args, **kwargs):
+    return 0
+
+def _null_module(name):
+    real = importlib.import_module(name)
+    mod = types.ModuleType(name)
+    for k, v in vars(real).items():
+        if not k.startswith("__"):
+            mod.__dict__[k] = _noop if callable(v) else v
+    return mod
+
+def _null_gl_game():
+    """Load the game module with GL / GLU / GLUT swapped for no-op modules."""
+    names = ("OpenGL.GL", "OpenGL.GLU", "OpenGL.GLUT")
+    saved = {n: sys.modules.get(n) for n in names + ("meshes",)}
+    try:
+        for n in names:
+            sys.modules[n] = _null_module(n)
+        sys.modules.pop("meshes", None)    # re-imported against the null GL
+        spec = importlib.util.spec_from_file_location("battle_tank_game_nullgl", GAME_PATH)
+        game = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(game)
+        game._log_stress = lambda draw_s: None
+        game.init_gl()
+    finally:
+        for n, m in saved.items():
+            if m is None:
+                sys.modules.pop(n, None)
+            else:
+                sys.modules[n] = m
+    return game
+
+# ---------- Runner ----------
+def _sample(world, blob, fn, repeat, budget_s):
+    """Per-call times (us): restore `blob`, time one `fn(world)`; at least 3, at most `repeat` samples."""
+    out = []
+    t_end = time.perf_counter() + budget_s
+    while len(out) < repeat and (len(out) < 3 or time.perf_counter() < t_end):
+        world.restore(blob)
+        t0 = time.perf_counter()
+        fn(world)
+        out.append((time.perf_counter() - t0) * 1e6)
+    return out
+
+def build_scenario(name):
+    """The scenario's world after its warm-up ticks (aim policy, player invincible).
+
+    The turret tracks targets throughout but only fires in the last FIRE_TICKS,
+    so the warm-up cannot kill the bosses the scenario is about. Invincibility
+    is switched off at the end so the timed ticks include the
+    hostile-bullets-vs-player pass.
+    """
+    world, warmup = SCENARIOS[name]()
+    if not world.cheat_invincible:
+        world.toggle_cheat()
+    for k in range(warmup):
+        aim_policy(world, fire=k >= warmup - FIRE_TICKS)
+        world.step(world.tick_ms)
+    world.cheat_invincible = False
+    dead = [b for b in EXPECT_BOSSES.get(name, ()) if getattr(world, b) is None]
+    if dead:
+        raise RuntimeError(f"scenario {name}: {', '.join(dead)} gone after warm-up")
+    return world
+
+def run_suite(scenarios, repeat=50, budget_s=1.0, log=print):
+    game = _null_gl_game()
+    paths = dict(PATHS)
+    paths["show_screen"] = (None, lambda w: game.showScreen())
+    results = {}
+    for sc in scenarios:
+        world = build_scenario(sc)
+        game.world = world
+        blob = world.snapshot()
+        for path, (applies, fn) in paths.items():
+            if applies is not None and not applies(world):
+                continue
+            t = _sample(world, blob, fn, repeat, budget_s)
+            key = f"{sc}/{path}"
+            results[key] = dict(median_us=statistics.median(t), min_us=min(t), n=len(t))
+            log(f"{key:<44} {results[key]['median_us']:>11.1f} us  (min {results[key]['min_us']:.1f}, n={len(t)})")
+    return results
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(GAME_PATH)).stdout.strip() or None
+    except OSError:
+        return None
+
+def _meta(args):
+    return dict(format=FORMAT, created=time.strftime("%Y-%m-%dT%H:%M:%S"), git=_git_rev(),
+                python=platform.python_version(), numpy=np.__version__, machine=platform.machine(),
+                cpu_count=os.cpu_count(), repeat=args.repeat, budget_s=args.budget)
+
+# ---------- Compare ----------
+def compare(base, new, threshold=0.15, floor_us=5.0):
+    """Rows (key, base_us, new_us, ratio, flag) for keys in both; flag is "REGRESSION",
+    "faster" or "" (a change under `floor_us` is never flagged)."""
+    rows = []
+    for key in sorted(set(base["results"]) & set(new["results"])):
+        b = base["results"][key]["median_us"]
+        n = new["results"][key]["median_us"]
+        ratio = n / b if b > 0 else float("inf")
+        flag = ""
+        if abs(n - b) >= floor_us:
+            if ratio > 1.0 + threshold:
+                flag = "REGRESSION"
+            elif ratio < 1.0 / (1.0 + threshold):
+                flag = "faster"
+        rows.append((key, b, n, ratio, flag))
+    return rows
+
+def _print_compare(base, new, args):
+    rows = compare(base, new, args.threshold, args.floor)
+    print(f"{'path':<44} {'base us':>11} {'new us':>11} {'ratio':>7}")
+    for key, b, n, ratio, flag in rows:
+        print(f"{key:<44} {b:>11.1f} {n:>11.1f} {ratio:>7.2f} {flag}")
+    missing = sorted(set(base["results"]) - set(new["results"]))
+    if missing:
+        print(f"not in new results: {', '.join(missing)}")
+    bad = [r for r in rows if r[4] == "REGRESSION"]
+    print(f"{len(bad)} regression(s) over {args.threshold:.0%} (base {base['meta'].get('git')}, new {new['meta'].get('git')})")
+    return 1 if bad else 0
+
+def _load(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("meta", {}).get("format") != FORMAT:
+        raise SystemExit(f"{path}: not a format {FORMAT} benchmark file")
+    return data
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Battle Tanks benchmark suite")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="run the scenarios and write JSON results")
+    r.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma list of {', '.join(SCENARIOS)}")
+    r.add_argument("--repeat", type=int, default=50, help="max samples per path")
+    r.add_argument("--budget", type=float, default=1.0, help="seconds per path before stopping early (min 3 samples)")
+    r.add_argument("--out", metavar="PATH", help="write results JSON here")
+    r.add_argument("--baseline", metavar="PATH", help="compare against this results file when done")
+    c = sub.add_parser("compare", help="flag regressions of NEW against BASE")
+    c.add_argument("base")
+    c.add_argument("new")
+    for p in (r, c):
+        p.add_argument("--threshold", type=float, default=0.15, help="median slowdown that counts as a regression")
+        p.add_argument("--floor", type=float, default=5.0, help="ignore changes smaller than this many us")
+    args = ap.parse_args(argv)
+    if args.cmd == "compare":
+        return _print_compare(_load(args.base), _load(args.new), args)
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown scenario(s): {', '.join(unknown)}")
+    data = dict(meta=_meta(args), results=run_suite(scenarios, args.repeat, args.budget))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+    if args.baseline:
+        return _print_compare(_load(args.baseline), data, args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+# Battle Tanks — struct-of-arrays store for basic enemy tanks
+# One row per spawned tank; dead tanks keep their row with alive=False, as the
+# old list of dicts did, so a wave's indices stay stable until it is cleared.
+# The live count is kept up to date by spawn / kill instead of re-counted.
+import struct
+import numpy as np
+
+class EnemyStore:
+    """x, y, z, heading (hx, hy: unit vector, see heading.py), speed and alive
+    columns, the last steering velocity (vx, vy per ms, for tanks coasting
+    between AI updates) and the previous tick's pose."""
+
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.n_alive = 0
+        self._alloc(capacity)
+
+    def _alloc(self, cap):
+        self._x = np.zeros(cap)
+        self._y = np.zeros(cap)
+        self._z = np.zeros(cap)
+        self._hx = np.ones(cap)
+        self._hy = np.zeros(cap)
+        self._speed = np.zeros(cap)
+        self._alive = np.zeros(cap, dtype=bool)
+        self._vx = np.zeros(cap)
+        self._vy = np.zeros(cap)
+        self._px = np.zeros(cap)
+        self._py = np.zeros(cap)
+        self._phx = np.ones(cap)
+        self._phy = np.zeros(cap)
+
+    def _columns(self):
+        return (self._x, self._y, self._z, self._hx, self._hy, self._speed, self._alive,
+                self._vx, self._vy, self._px, self._py, self._phx, self._phy)
+
+    def _grow(self):
+        old = self._columns()
+        n = self.n
+        self._alloc(max(16, len(self._x) * 2))
+        for dst, src in zip(self._columns(), old):
+            dst[:n] = src[:n]
+
+    # ---------- Views over spawned rows ----------
+    @property
+    def x(self):
+        return self._x[:self.n]
+
+    @property
+    def y(self):
+        return self._y[:self.n]
+
+    @property
+    def z(self):
+        return self._z[:self.n]
+
+    @property
+    def hx(self):
+        return self._hx[:self.n]
+
+    @property
+    def hy(self):
+        return self._hy[:self.n]
+
+    @property
+    def speed(self):
+        return self._speed[:self.n]
+
+    @property
+    def alive(self):
+        return self._alive[:self.n]
+
+    @property
+    def vx(self):
+        return self._vx[:self.n]
+
+    @property
+    def vy(self):
+        return self._vy[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    # ---------- Spawn / clear ----------
+    def spawn(self, x, y, z, hx, hy, speed):
+        if self.n == len(self._x):
+            self._grow()
+        i = self.n
+        self._x[i] = self._px[i] = x
+        self._y[i] = self._py[i] = y
+        self._z[i] = z
+        self._hx[i] = self._phx[i] = hx
+        self._hy[i] = self._phy[i] = hy
+        self._speed[i] = speed
+        self._alive[i] = True
+        self._vx[i] = self._vy[i] = 0.0
+        self.n = i + 1
+        self.n_alive += 1
+        return i
+
+    def spawn_many(self, x, y, z, speed, hx=1.0, hy=0.0):
+        """Append one row per entry of the x / y / z / speed arrays (a compiled wave)."""
+        k = len(x)
+        while self.n + k > len(self._x):
+            self._grow()
+        s, e = self.n, self.n + k
+        self._x[s:e] = self._px[s:e] = x
+        self._y[s:e] = self._py[s:e] = y
+        self._z[s:e] = z
+        self._hx[s:e] = self._phx[s:e] = hx
+        self._hy[s:e] = self._phy[s:e] = hy
+        self._speed[s:e] = speed
+        self._alive[s:e] = True
+        self._vx[s:e] = self._vy[s:e] = 0.0
+        self.n = e
+        self.n_alive += k
+
+    def kill(self, i):
+        """Mark row i dead; False if it already was."""
+        if not self._alive[i]:
+            return False
+        self._alive[i] = False
+        self.n_alive -= 1
+        return True
+
+    def clear(self):
+        self.n = 0
+        self.n_alive = 0
+
+    def live(self):
+        """Row indices of live tanks, in spawn order."""
+        return np.flatnonzero(self.alive)
+
+    def alive_count(self):
+        return self.n_alive
+
+    # ---------- Snapshot ----------
+    _HEAD = struct.Struct("<I")
+
+    def to_bytes(self):
+        n = self.n
+        return self._HEAD.pack(n) + b"".join(col[:n].tobytes() for col in self._columns())
+
+    def load_bytes(self, buf, pos):
+        """Replace the contents from `to_bytes` output at buf[pos:]; returns the end offset."""
+        (n,) = self._HEAD.unpack_from(buf, pos)
+        pos += self._HEAD.size
+        if n > len(self._x):
+            self._alloc(n)
+        for col in self._columns():
+            col[:n] = np.frombuffer(buf, col.dtype, n, pos)
+            pos += n * col.itemsize
+        self.n = n
+        self.n_alive = int(np.count_nonzero(self._alive[:n]))
+        return pos
+
+    # ---------- Render interpolation ----------
+    def save_prev(self):
+        n = self.n
+        self._px[:n] = self._x[:n]
+        self._py[:n] = self._y[:n]
+        self._phx[:n] = self._hx[:n]
+        self._phy[:n] = self._hy[:n]
+
+    def pose(self, alpha):
+        """(x, y, hx, hy) arrays for every row, between the previous and current tick.
+
+        The headings are blended but not renormalised: they give the right
+        direction (atan2 for glRotatef), not unit length.
+        """
+        n = self.n
+        px, py, phx, phy = self._px[:n], self._py[:n], self._phx[:n], self._phy[:n]
+        return (px + (self._x[:n] - px) * alpha,
+                py + (self._y[:n] - py) * alpha,
+                phx + (self._hx[:n] - phx) * alpha,
+                phy + (self._hy[:n] - phy) * alpha)
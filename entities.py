@@ -0,0 +1,67 @@
+# Battle Tanks — boss entities
+# Bosses and MiniBoss3 clones are few but touched every tick, so they are
+# slotted classes (fixed attributes, no per-instance dict) rather than dicts.
+# Basic enemies and projectiles live in array stores instead (enemy_store.py,
+# projectile_store.py).
+
+class Tank:
+    """Pose shared by every boss tank: position and heading unit vector (hx, hy).
+
+    (px, py, phx, phy) is the previous tick's, for render interpolation.
+    """
+    __slots__ = ("x", "y", "z", "hx", "hy", "px", "py", "phx", "phy")
+
+    def __init__(self, x, y, z, hx, hy):
+        self.x = self.px = x
+        self.y = self.py = y
+        self.z = z
+        self.hx = self.phx = hx
+        self.hy = self.phy = hy
+
+class MiniBoss1(Tank):
+    __slots__ = ("turret_rel", "hp", "fire_t", "fire_cd", "bullet_speed", "speed", "turn_speed")
+
+    def __init__(self, x, y, z, hx, hy, hp, fire_cd, bullet_speed, speed, turn_speed):
+        super().__init__(x, y, z, hx, hy)
+        self.turret_rel = 0.0
+        self.hp = hp
+        self.fire_t = 0.0
+        self.fire_cd = fire_cd
+        self.bullet_speed = bullet_speed
+        self.speed = speed
+        self.turn_speed = turn_speed
+
+class MiniBoss2(Tank):
+    __slots__ = ("turret_rel", "hp", "fire_t", "aura_t")
+
+    def __init__(self, x, y, z, hx, hy, hp):
+        super().__init__(x, y, z, hx, hy)
+        self.turret_rel = 0.0
+        self.hp = hp
+        self.fire_t = 0.0
+        self.aura_t = 0.0
+
+class Clone(Tank):
+    """One of MiniBoss3's two clones."""
+    __slots__ = ("hp", "fire_t", "alive")
+
+    def __init__(self, x, y, z, hx, hy, hp):
+        super().__init__(x, y, z, hx, hy)
+        self.hp = hp
+        self.fire_t = 0.0
+        self.alive = True
+
+class MiniBoss3:
+    __slots__ = ("clones",)
+
+    def __init__(self, clones):
+        self.clones = clones
+
+class FinalBoss(Tank):
+    __slots__ = ("hp", "phase", "phase_t")
+
+    def __init__(self, x, y, z, hx, hy, hp, phase):
+        super().__init__(x, y, z, hx, hy)
+        self.hp = hp
+        self.phase = phase
+        self.phase_t = 0.0
@@ -0,0 +1,63 @@
+# Battle Tanks — view frustum for culling and level of detail
+# Built from the same eye / target / up and perspective that setupCamera hands
+# to gluLookAt / gluPerspective. Six inward-facing planes; a bounding sphere is
+# drawn unless it lies wholly outside one of them. Single tests are plain
+# Python (a few per frame); arrays of centres are tested in one numpy pass.
+import math
+import numpy as np
+
+def _unit(v):
+    n = math.sqrt(v[0]*v[0] + v[1]*v[1] + v[2]*v[2])
+    return (v[0]/n, v[1]/n, v[2]/n)
+
+def _cross(a, b):
+    return (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0])
+
+def _dot(a, b):
+    return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+class Frustum:
+    """planes: six (nx, ny, nz, d) with unit normals pointing inside (near, far, left, right, bottom, top)."""
+
+    def __init__(self, eye, target, up, fovy_deg, aspect, near, far, viewport_h):
+        f = _unit((target[0] - eye[0], target[1] - eye[1], target[2] - eye[2]))
+        s = _unit(_cross(f, up))
+        u = _cross(s, f)
+        ty = math.tan(math.radians(fovy_deg) * 0.5)
+        tx = ty * aspect
+        planes = [(f, _dot(f, eye) + near), ((-f[0], -f[1], -f[2]), -_dot(f, eye) - far)]
+        for side, t in ((s, tx), ((-s[0], -s[1], -s[2]), tx), (u, ty), ((-u[0], -u[1], -u[2]), ty)):
+            n = _unit((t*f[0] + side[0], t*f[1] + side[1], t*f[2] + side[2]))
+            planes.append((n, _dot(n, eye)))
+        # n . p - d >= 0 inside; stored as (nx, ny, nz, -d)
+        self.planes = tuple((n[0], n[1], n[2], -d) for n, d in planes)
+        self._planes = np.array(self.planes)
+        self.eye = tuple(eye)
+        # screen pixels per world unit at distance 1
+        self.px_scale = viewport_h * 0.5 / ty
+
+    def visible(self, x, y, z, r):
+        """True where the sphere (x, y, z, r) is at least partly inside (scalars or arrays)."""
+        if np.ndim(x) == 0:
+            for a, b, c, d in self.planes:
+                if a*x + b*y + c*z + d < -r:
+                    return False
+            return True
+        p = self._planes
+        dist = p[:, 0:1] * x + p[:, 1:2] * y + p[:, 2:3] * np.atleast_1d(z) + p[:, 3:4]
+        return (dist >= -np.atleast_1d(r)).all(axis=0)
+
+    def pixel_radius(self, x, y, z, r):
+        """Approximate on-screen radius in pixels: r over the distance from the eye, scaled."""
+        ex, ey, ez = self.eye
+        d = np.sqrt((x - ex) ** 2 + (y - ey) ** 2 + (z - ez) ** 2)
+        return r * self.px_scale / np.maximum(d, 1e-6)
+
+    def box_visible(self, lo, hi):
+        """Axis-aligned box: False only if it lies wholly outside some plane."""
+        for a, b, c, d in self.planes:
+            # the corner farthest along the normal
+            if (a * (hi[0] if a >= 0.0 else lo[0]) + b * (hi[1] if b >= 0.0 else lo[1])
+                    + c * (hi[2] if c >= 0.0 else lo[2]) + d < 0.0):
+                return False
+        return True
@@ -0,0 +1,26 @@
+# Battle Tanks — array geometry kernels shared by the collision code
+import numpy as np
+
+def point_segment_dist2_np(px, py, ax, ay, bx, by):
+    """tank_sim.point_segment_dist2 over NumPy arrays (broadcast): squared distance from P to segment AB."""
+    vx, vy = bx - ax, by - ay
+    wx, wy = px - ax, py - ay
+    vv = vx*vx + vy*vy
+    # a zero-length segment (bullet spawned after integrate) gives t = 0: distance to A
+    t = np.minimum(np.maximum((wx*vx + wy*vy) / np.maximum(vv, 1e-8), 0.0), 1.0)
+    dx = ax + t*vx - px
+    dy = ay + t*vy - py
+    return dx*dx + dy*dy
+
+def ray_box_exit(ox, oy, ang_deg, half, max_len=np.inf):
+    """Where rays from (ox, oy) at ang_deg leave the square [-half, half]^2, capped at max_len.
+
+    Arrays in, (ex, ey) arrays out. Origins are expected inside the square.
+    """
+    a = np.radians(ang_deg)
+    dx, dy = np.cos(a), np.sin(a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tx = np.where(dx > 1e-6, (half - ox) / dx, np.where(dx < -1e-6, (-half - ox) / dx, np.inf))
+        ty = np.where(dy > 1e-6, (half - oy) / dy, np.where(dy < -1e-6, (-half - oy) / dy, np.inf))
+    t = np.minimum(np.minimum(tx, ty), max_len)
+    return ox + dx * t, oy + dy * t
@@ -0,0 +1,59 @@
+# Battle Tanks — heading unit vectors
+# Tanks face along a cached unit vector (hx, hy) rather than a yaw in degrees.
+# Moving, strafing and muzzle offsets are multiply-adds on it and aiming at a
+# point is one normalise. An angle the player turns by key (hull, barrel) is
+# still integrated in degrees, as the turn rates are given, and its vector is
+# recomputed only on ticks it changes. Degrees only come back out (yaw_deg)
+# where the front end hands an angle to glRotatef.
+import math
+
+def heading(deg):
+    """Unit vector for a yaw in degrees (0 -> +X, counter-clockwise).
+
+    Same rounding as tank_sim.rad, so it matches cos / sin of rad(deg) exactly.
+    """
+    a = deg * math.pi / 180.0
+    return math.cos(a), math.sin(a)
+
+def toward(dx, dy):
+    """Unit vector along (dx, dy); +X for a zero vector."""
+    d = math.hypot(dx, dy)
+    if d <= 0.0:
+        return 1.0, 0.0
+    return dx / d, dy / d
+
+def rotate(hx, hy, rx, ry):
+    """(hx, hy) turned by the rotation whose unit vector is (rx, ry)."""
+    return hx * rx - hy * ry, hx * ry + hy * rx
+
+_ROTATIONS = {}
+
+def rotations(offsets):
+    """Rotation unit vectors for a tuple of angles in degrees (a spread volley).
+
+    Cached by the angles themselves, so a spread constant changed at run
+    time (balance.py) gets its own entry on the next volley.
+    """
+    r = _ROTATIONS.get(offsets)
+    if r is None:
+        if len(_ROTATIONS) > 64:
+            _ROTATIONS.clear()
+        r = _ROTATIONS[offsets] = tuple(heading(a) for a in offsets)
+    return r
+
+def rel_deg(hx, hy, dx, dy):
+    """Signed angle in degrees from heading (hx, hy) to direction (dx, dy), in [-180, 180]."""
+    return math.atan2(hx * dy - hy * dx, hx * dx + hy * dy) * 180.0 / math.pi
+
+def lerp(phx, phy, hx, hy, alpha):
+    """Unit heading between the previous and current one (render interpolation)."""
+    x = phx + (hx - phx) * alpha
+    y = phy + (hy - phy) * alpha
+    d = math.hypot(x, y)
+    if d < 1e-9:                 # turned half a circle in one tick
+        return hx, hy
+    return x / d, y / d
+
+def yaw_deg(hx, hy):
+    """Yaw in degrees of a heading, for glRotatef."""
+    return math.atan2(hy, hx) * 180.0 / math.pi
@@ -0,0 +1,129 @@
+# Battle Tanks — level / wave / boss definitions
+# Levels are data (levels.json); each is compiled once into a Level with a
+# flat spawn table (x, y, speed arrays, one slice per wave), so spawning a
+# wave is a single bulk insert into the enemy store.
+import hashlib, json, math, os
+import numpy as np
+
+LEVELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels.json")
+BOSS_KINDS = ("miniboss1", "miniboss2", "miniboss3", "final_boss")
+BANNERS = ("level1_complete", "level2_complete", "final_boss")   # World.<banner>_banner_ms
+GOLDEN_ANGLE_DEG = 180.0 * (3.0 - math.sqrt(5.0))
+
+class Level:
+    """One compiled level: spawn table, fire cooldowns, boss trigger and completion."""
+    __slots__ = ("name", "enemy_fire_cd_ms", "enemy_fire_all", "player_fire_cd_ms", "player_bullet_size", "player_spread_deg",
+                 "spawn_x", "spawn_y", "spawn_z", "spawn_speed", "wave_starts",
+                 "boss", "boss_after_kills", "boss_needs_clear", "boss_clears_enemy_bullets",
+                 "banner", "banner_ms", "win")
+
+    @property
+    def n_waves(self):
+        return len(self.wave_starts) - 1
+
+    def wave(self, k):
+        """(x, y, z, speed) arrays for wave k."""
+        s, e = self.wave_starts[k], self.wave_starts[k + 1]
+        return self.spawn_x[s:e], self.spawn_y[s:e], self.spawn_z[s:e], self.spawn_speed[s:e]
+
+def ring_layout(count, radius, phase_deg=0.0):
+    """`count` points evenly spaced on a circle (the level 2 / 3 ring)."""
+    ang = 2.0 * math.pi * np.arange(count) / count + math.radians(phase_deg)
+    return np.cos(ang) * radius, np.sin(ang) * radius
+
+def rings_layout(count, per_ring, radius, inner_radius):
+    """`count` points as concentric rings of `per_ring` from `radius` inward to `inner_radius`.
+
+    Each ring is rotated by the golden angle from the one outside it, so
+    tanks on different rings never share a line toward the centre.
+    """
+    n_rings = max(1, -(-count // per_ring))
+    radii = np.linspace(radius, inner_radius, n_rings) if n_rings > 1 else (radius,)
+    xs, ys = [], []
+    for k, r in enumerate(radii):
+        m = min(per_ring, count - k * per_ring)
+        x, y = ring_layout(m, r, k * GOLDEN_ANGLE_DEG)
+        xs.append(x)
+        ys.append(y)
+    return np.concatenate(xs), np.concatenate(ys)
+
+def _wave_xy(w, where):
+    layout = w.get("layout")
+    if layout == "ring":
+        return ring_layout(int(w["count"]), float(w["radius"]), float(w.get("phase_deg", 0.0)))
+    if layout == "rings":
+        return rings_layout(int(w["count"]), int(w.get("per_ring", 10)), float(w["radius"]),
+                            float(w.get("inner_radius", 100.0)))
+    if layout == "points":
+        pts = np.asarray(w["points"], dtype=float).reshape(-1, 2) * float(w.get("scale", 1.0))
+        return pts[:, 0].copy(), pts[:, 1].copy()
+    raise ValueError(f"{where}: unknown wave layout {layout!r}")
+
+def compile_level(d, index):
+    """Turn one level dict from the data file into a Level."""
+    where = f"level {index}"
+    lv = Level()
+    lv.name = d.get("name", f"Level {index}")
+    lv.enemy_fire_cd_ms = float(d.get("enemy_fire_cd_ms", 1800))
+    fire = d.get("enemy_fire", "one")
+    if fire not in ("one", "all"):
+        raise ValueError(f"{where}: enemy_fire must be 'one' or 'all', not {fire!r}")
+    lv.enemy_fire_all = fire == "all"    # "one": a single enemy bullet in flight at a time
+    player = d.get("player", {})
+    lv.player_fire_cd_ms = float(player.get("fire_cd_ms", 600))
+    lv.player_bullet_size = float(player.get("bullet_size", 4.0))
+    lv.player_spread_deg = tuple(float(a) for a in player.get("spread_deg", (0.0,)))
+    xs, ys, zs, speeds, starts = [], [], [], [], [0]
+    for k, w in enumerate(d.get("waves", ())):
+        x, y = _wave_xy(w, f"{where} wave {k}")
+        xs.append(x)
+        ys.append(y)
+        zs.append(np.full(len(x), float(w.get("z", 20.0))))
+        speeds.append(np.full(len(x), float(w["speed"])))
+        starts.append(starts[-1] + len(x))
+    cat = lambda parts: np.concatenate(parts) if parts else np.zeros(0)
+    lv.spawn_x, lv.spawn_y, lv.spawn_z, lv.spawn_speed = cat(xs), cat(ys), cat(zs), cat(speeds)
+    lv.wave_starts = np.array(starts, dtype=np.intp)
+    boss = d.get("boss")
+    lv.boss = boss["kind"] if boss else None
+    if lv.boss is not None and lv.boss not in BOSS_KINDS:
+        raise ValueError(f"{where}: unknown boss kind {lv.boss!r}")
+    boss = boss or {}
+    lv.boss_after_kills = int(boss.get("after_kills", 0))
+    lv.boss_needs_clear = bool(boss.get("needs_clear", False))
+    lv.boss_clears_enemy_bullets = bool(boss.get("clear_enemy_bullets", False))
+    done = d.get("complete", {})
+    lv.banner = done.get("banner")
+    if lv.banner is not None and lv.banner not in BANNERS:
+        raise ValueError(f"{where}: unknown banner {lv.banner!r}")
+    lv.banner_ms = float(done.get("banner_ms", 0))
+    lv.win = bool(done.get("win", False))
+    return lv
+
+def load_levels(path=LEVELS_PATH):
+    """Read and compile a levels file; returns a tuple of Level (level 1 first)."""
+    with open(path) as f:
+        data = json.load(f)
+    levels = tuple(compile_level(d, i + 1) for i, d in enumerate(data["levels"]))
+    if not levels:
+        raise ValueError(f"{path}: no levels")
+    return levels
+
+def levels_digest(levels):
+    """16-byte fingerprint of a compiled level set (a replay checks it runs on the set it was recorded with)."""
+    h = hashlib.blake2b(digest_size=16)
+    for lv in levels:
+        for name in Level.__slots__:
+            v = getattr(lv, name)
+            h.update(v.tobytes() if isinstance(v, np.ndarray) else repr(v).encode())
+    return h.digest()
+
+def stress_level(n, per_ring=10):
+    """A single endless level of `n` basic enemies in level 3 style rings that all fire together."""
+    return compile_level({
+        "name": f"Stress x{n}",
+        "enemy_fire_cd_ms": 1000,
+        "enemy_fire": "all",
+        "waves": [{"layout": "rings", "count": n, "per_ring": per_ring, "radius": 450.0,
+                   "inner_radius": 100.0, "speed": 0.45}],
+    }, 1)
@@ -0,0 +1,154 @@
+# Battle Tanks — tank models compiled to GL display lists, batched bullet spheres
+# A model is a hull plus a turret, each a handful of boxes and spheres. Both
+# are compiled once; drawing a tank is then a translate / rotate and one
+# glCallList (two when the turret turns on its own). Bullets of one kind are
+# drawn together: every sphere's vertices in one array, one glDrawElements.
+import math
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLUT import *
+
+def box(at, color, size):
+    """Box part: centre (x, y, z), (r, g, b), (width->+X, depth->+Y, height->+Z)."""
+    return ("box", at, color, size)
+
+def sphere(at, color, radius, slices, stacks):
+    return ("sphere", at, color, (radius, slices, stacks))
+
+def _emit(parts, dz=0.0):
+    for kind, (x, y, z), color, size in parts:
+        glPushMatrix()
+        glTranslatef(x, y, z + dz)
+        glColor3f(*color)
+        if kind == "box":
+            glScalef(*size)
+            glutSolidCube(1.0)
+        else:
+            glutSolidSphere(*size)
+        glPopMatrix()
+
+def _compile(parts, dz=0.0):
+    lst = glGenLists(1)
+    glNewList(lst, GL_COMPILE)
+    _emit(parts, dz)
+    glEndList()
+    return lst
+
+def _extent(parts, dz=0.0):
+    """Farthest distance of any part from the origin (box half-diagonal / sphere radius past its centre)."""
+    r = 0.0
+    for kind, (x, y, z), color, size in parts:
+        reach = math.sqrt(sum((0.5 * v) ** 2 for v in size)) if kind == "box" else size[0]
+        r = max(r, math.sqrt(x * x + y * y + (z + dz) ** 2) + reach)
+    return r
+
+class TankMesh:
+    """Hull parts in tank space; turret parts in turret space, `turret_z` above the hull origin.
+
+    `radius` bounds the whole tank (at any turret angle) around its origin,
+    for culling. The far level of detail leaves out the spheres, which are
+    most of the triangles and a pixel or two across at that distance.
+    """
+
+    def __init__(self, hull, turret_z, turret):
+        self.hull_parts = tuple(hull)
+        self.turret_z = turret_z
+        self.turret_parts = tuple(turret)
+        self.radius = max(_extent(self.hull_parts), _extent(self.turret_parts, turret_z))
+        self.near = self.far = None     # (hull, turret, whole) display lists
+
+    def _compile_lod(self, keep):
+        hull = [p for p in self.hull_parts if keep(p)]
+        turret = [p for p in self.turret_parts if keep(p)]
+        whole = glGenLists(1)
+        glNewList(whole, GL_COMPILE)
+        _emit(hull)
+        _emit(turret, self.turret_z)
+        glEndList()
+        return _compile(hull), _compile(turret), whole
+
+    def compile(self):
+        """Build the display lists (needs a current GL context)."""
+        self.near = self._compile_lod(lambda p: True)
+        self.far = self._compile_lod(lambda p: p[0] == "box")
+
+    def draw(self, x, y, z, yaw, turret_rel=None, far=False):
+        """Tank at (x, y, z) facing `yaw` degrees; turret_rel turns the turret against the hull."""
+        hull, turret, whole = self.far if far else self.near
+        glPushMatrix()
+        glTranslatef(x, y, z)
+        glRotatef(yaw, 0, 0, 1)
+        if turret_rel is None:
+            glCallList(whole)
+        else:
+            glCallList(hull)
+            glTranslatef(0.0, 0.0, self.turret_z)
+            glRotatef(turret_rel, 0, 0, 1)
+            glCallList(turret)
+        glPopMatrix()
+
+# ---------- Bullets ----------
+def _unit_sphere(slices, stacks):
+    """(vertices (V, 3) float32, triangles (T, 3)) of a lat-long unit sphere."""
+    verts = [(0.0, 0.0, 1.0)]
+    for i in range(1, stacks):
+        phi = np.pi * i / stacks
+        for j in range(slices):
+            theta = 2.0 * np.pi * j / slices
+            verts.append((np.sin(phi) * np.cos(theta), np.sin(phi) * np.sin(theta), np.cos(phi)))
+    verts.append((0.0, 0.0, -1.0))
+    bottom = len(verts) - 1
+    ring = lambda i, j: 1 + (i - 1) * slices + j % slices
+    tris = [(0, ring(1, j), ring(1, j + 1)) for j in range(slices)]
+    for i in range(1, stacks - 1):
+        for j in range(slices):
+            a, b = ring(i, j), ring(i, j + 1)
+            c, d = ring(i + 1, j), ring(i + 1, j + 1)
+            tris += [(a, c, d), (a, d, b)]
+    tris += [(ring(stacks - 1, j), bottom, ring(stacks - 1, j + 1)) for j in range(slices)]
+    return np.array(verts, dtype=np.float32), np.array(tris, dtype=np.uint32)
+
+class SphereBatch:
+    """Draws any number of same-colour spheres with one vertex upload and one draw call.
+
+    Every sphere is the same low-poly unit mesh, scaled and moved on the CPU;
+    the index array for n spheres is built once and reused (grown as needed).
+    """
+
+    def __init__(self, slices=10, stacks=5):
+        unit, tris = _unit_sphere(slices, stacks)
+        self.n_verts = len(unit)
+        self.unit = unit.ravel()       # x, y, z per vertex, flat
+        self.tris = tris.ravel()
+        self._indices = np.zeros(0, dtype=np.uint32)
+
+    def indices(self, n):
+        """Triangle indices for the first n spheres."""
+        k = len(self.tris)
+        if len(self._indices) < n * k:
+            cap = max(n, 2 * len(self._indices) // k, 64)
+            base = np.arange(cap, dtype=np.uint32)[:, None] * np.uint32(self.n_verts)
+            self._indices = (base + self.tris).ravel()
+        return self._indices[:n * k]
+
+    def vertices(self, xs, ys, zs, radius):
+        """(n * V, 3) float32: the unit mesh scaled by radius (scalar or per sphere) at each centre."""
+        n = len(xs)
+        centres = np.empty((n, 3), dtype=np.float32)
+        centres[:, 0] = xs
+        centres[:, 1] = ys
+        centres[:, 2] = zs
+        out = np.repeat(centres, self.n_verts, axis=0)
+        # one row of 3V floats per sphere keeps numpy's inner loops long
+        out.reshape(n, len(self.unit))[:] += np.multiply.outer(np.asarray(radius, dtype=np.float32), self.unit)
+        return out
+
+    def draw(self, xs, ys, zs, radius, color):
+        if len(xs) == 0:
+            return
+        glColor3f(*color)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 0, self.vertices(xs, ys, zs, radius))
+        idx = self.indices(len(xs))
+        glDrawElements(GL_TRIANGLES, len(idx), GL_UNSIGNED_INT, idx)
+        glDisableClientState(GL_VERTEX_ARRAY)
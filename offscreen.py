@@ -0,0 +1,423 @@
+# Battle Tanks — offscreen rendering and frame capture
+# Runs the game's own showScreen without a window: a GL context from EGL on
+# Mesa's surfaceless platform (llvmpipe on a display-less server) or from
+# OSMesa (PYOPENGL_PLATFORM=osmesa), drawing into a framebuffer object. Each
+# frame is read back into one of a ring of pixel buffer objects, so
+# glReadPixels returns at once and the frame is mapped a few frames later;
+# a writer thread encodes frames to Y4M, raw RGB or a numbered image sequence.
+# The world runs on a ManualClock, one step per output frame, so footage
+# renders as fast as the machine can draw it.
+#
+#   python offscreen.py --replay match.btr --out match.y4m
+#   python offscreen.py --seed 3 --policy aim --seconds 20 --out frames/%05d.png
+import os
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")   # before anything imports OpenGL
+import argparse, ctypes, importlib, importlib.util, math, queue, struct, sys, threading, time, types, zlib
+import numpy as np
+from OpenGL.GL import *
+from tank_sim import World, ManualClock, POLICIES
+from replay import Replay
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Battle Tank Game (2).py")
+PBO_RING = 3            # frames in flight between glReadPixels and mapping the result
+WRITE_QUEUE = 8         # frames waiting for the writer thread before the draw loop waits
+
+# ---------- Contexts ----------
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+
+class EGLContext:
+    """Desktop GL context with no surface (EGL_KHR_surfaceless_context); draws go to an FBO."""
+
+    def __init__(self):
+        from OpenGL import EGL
+        from OpenGL.EGL.EXT.platform_base import eglGetPlatformDisplayEXT
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        dpy = eglGetPlatformDisplayEXT(EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+        if not dpy or not EGL.eglInitialize(dpy, ctypes.byref(major), ctypes.byref(minor)):
+            dpy = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+            if not EGL.eglInitialize(dpy, ctypes.byref(major), ctypes.byref(minor)):
+                raise RuntimeError("EGL: no display (need Mesa's surfaceless platform or a GPU driver)")
+        attrs = (EGL.EGLint * 3)(EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+        config, n = EGL.EGLConfig(), EGL.EGLint()
+        EGL.eglChooseConfig(dpy, attrs, ctypes.byref(config), 1, ctypes.byref(n))
+        if not EGL.eglBindAPI(EGL.EGL_OPENGL_API):
+            raise RuntimeError("EGL: desktop OpenGL is not available")
+        # with no matching config, EGL_KHR_no_config_context still makes a context
+        self.ctx = EGL.eglCreateContext(dpy, config if n.value else EGL.EGLConfig(), EGL.EGL_NO_CONTEXT, None)
+        if not self.ctx or not EGL.eglMakeCurrent(dpy, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, self.ctx):
+            raise RuntimeError("EGL: could not make a surfaceless OpenGL context current")
+        self.dpy = dpy
+
+    def close(self):
+        from OpenGL import EGL
+        EGL.eglMakeCurrent(self.dpy, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+        EGL.eglDestroyContext(self.dpy, self.ctx)
+        EGL.eglTerminate(self.dpy)
+
+class OSMesaContext:
+    """Mesa's pure software context; it renders into a client buffer, but the FBO is used the same way."""
+
+    def __init__(self, width, height):
+        from OpenGL import osmesa
+        self.ctx = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        if not self.ctx:
+            raise RuntimeError("OSMesa: could not create a context")
+        self.buf = (ctypes.c_ubyte * (width * height * 4))()
+        if not osmesa.OSMesaMakeCurrent(self.ctx, self.buf, GL_UNSIGNED_BYTE, width, height):
+            raise RuntimeError("OSMesa: could not make the context current")
+
+    def close(self):
+        from OpenGL import osmesa
+        osmesa.OSMesaDestroyContext(self.ctx)
+
+def make_context(width, height):
+    if os.environ["PYOPENGL_PLATFORM"] == "osmesa":
+        return OSMesaContext(width, height)
+    return EGLContext()
+
+class Framebuffer:
+    """RGBA8 colour + 24-bit depth renderbuffers, bound for drawing and reading."""
+
+    def __init__(self, width, height):
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        self.rbos = glGenRenderbuffers(2)
+        for rbo, fmt, attachment in ((self.rbos[0], GL_RGBA8, GL_COLOR_ATTACHMENT0),
+                                     (self.rbos[1], GL_DEPTH_COMPONENT24, GL_DEPTH_ATTACHMENT)):
+            glBindRenderbuffer(GL_RENDERBUFFER, rbo)
+            glRenderbufferStorage(GL_RENDERBUFFER, fmt, width, height)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, attachment, GL_RENDERBUFFER, rbo)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("offscreen framebuffer is incomplete")
+
+# ---------- GLUT without a window ----------
+# freeglut refuses to draw before glutInit, and glutInit needs an X display.
+# The game only draws with solid cubes, solid spheres and bitmap text, so
+# those are done here with plain GL (the glyphs come from freeglut's own font
+# tables) and the window-system calls become no-ops.
+class _SFGFont(ctypes.Structure):
+    _fields_ = [("name", ctypes.c_char_p), ("quantity", ctypes.c_int), ("height", ctypes.c_int),
+                ("characters", ctypes.POINTER(ctypes.POINTER(ctypes.c_ubyte))),
+                ("xorig", ctypes.c_float), ("yorig", ctypes.c_float)]
+
+class HeadlessGlut:
+    def __init__(self, glut_dll):
+        self._font_by_id = glut_dll.fghFontByID
+        self._font_by_id.restype = ctypes.POINTER(_SFGFont)
+        self._font_by_id.argtypes = [ctypes.c_void_p]
+        self._glyphs = {}    # (font id, char) -> (width, height, xorig, yorig, bitmap bytes)
+
+    def solid_cube(self, size):
+        h = size * 0.5
+        glBegin(GL_QUADS)
+        for n, corners in _CUBE_FACES:
+            glNormal3f(*n)
+            for c in corners:
+                glVertex3f(c[0] * h, c[1] * h, c[2] * h)
+        glEnd()
+
+    def solid_sphere(self, radius, slices, stacks):
+        for i in range(stacks):
+            z0, z1 = math.cos(math.pi * i / stacks), math.cos(math.pi * (i + 1) / stacks)
+            r0, r1 = math.sin(math.pi * i / stacks), math.sin(math.pi * (i + 1) / stacks)
+            glBegin(GL_QUAD_STRIP)
+            for j in range(slices + 1):
+                a = 2.0 * math.pi * j / slices
+                c, s = math.cos(a), math.sin(a)
+                glNormal3f(c * r0, s * r0, z0)
+                glVertex3f(c * r0 * radius, s * r0 * radius, z0 * radius)
+                glNormal3f(c * r1, s * r1, z1)
+                glVertex3f(c * r1 * radius, s * r1 * radius, z1 * radius)
+            glEnd()
+
+    def _glyph(self, font, ch):
+        key = (font.value, ch)
+        g = self._glyphs.get(key)
+        if g is None:
+            f = self._font_by_id(font.value).contents
+            face = f.characters[ch]
+            width = face[0]
+            data = bytes(face[1:1 + f.height * ((width + 7) // 8)])
+            g = self._glyphs[key] = (width, f.height, f.xorig, f.yorig, data)
+        return g
+
+    def bitmap_character(self, font, ch):
+        """As freeglut's glutBitmapCharacter: one glBitmap from the font's packed rows."""
+        width, height, xorig, yorig, data = self._glyph(font, ch)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glBitmap(width, height, xorig, yorig, float(width), 0.0, data)
+
+    def module(self, real):
+        mod = types.ModuleType(real.__name__)
+        for k, v in vars(real).items():
+            if not k.startswith("__"):
+                mod.__dict__[k] = (lambda *a, **kw: 0) if callable(v) and k.startswith("glut") else v
+        mod.glutSolidCube = self.solid_cube
+        mod.glutSolidSphere = self.solid_sphere
+        mod.glutBitmapCharacter = self.bitmap_character
+        return mod
+
+_CUBE_FACES = (
+    ((1, 0, 0), ((1, -1, -1), (1, 1, -1), (1, 1, 1), (1, -1, 1))),
+    ((-1, 0, 0), ((-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1))),
+    ((0, 1, 0), ((-1, 1, -1), (-1, 1, 1), (1, 1, 1), (1, 1, -1))),
+    ((0, -1, 0), ((-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1))),
+    ((0, 0, 1), ((-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1))),
+    ((0, 0, -1), ((-1, -1, -1), (-1, 1, -1), (1, 1, -1), (1, -1, -1))),
+)
+
+def load_game(width, height):
+    """The game module drawing at width x height into the current context, GLUT calls replaced."""
+    from OpenGL import platform
+    real = importlib.import_module("OpenGL.GLUT")
+    saved = {n: sys.modules.get(n) for n in ("OpenGL.GLUT", "meshes")}
+    try:
+        sys.modules["OpenGL.GLUT"] = HeadlessGlut(platform.PLATFORM.GLUT).module(real)
+        sys.modules.pop("meshes", None)
+        spec = importlib.util.spec_from_file_location("battle_tank_game_offscreen", GAME_PATH)
+        game = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(game)
+    finally:
+        for n, m in saved.items():
+            if m is None:
+                sys.modules.pop(n, None)
+            else:
+                sys.modules[n] = m
+    game.WINDOW_W, game.WINDOW_H = width, height
+    game._log_stress = lambda draw_s: None
+    game.init_gl()
+    return game
+
+# ---------- Capture ----------
+class FrameCapture:
+    """Asynchronous readback: glReadPixels into a ring of `depth` PBOs, mapped `depth` frames later."""
+
+    def __init__(self, width, height, sink, depth=PBO_RING):
+        self.width, self.height, self.sink = width, height, sink
+        self.size = width * height * 4
+        self.pbos = [int(b) for b in np.atleast_1d(glGenBuffers(depth))]
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.n = 0
+
+    def grab(self):
+        """Start reading the frame just drawn; hands the one from `depth` frames ago to the sink."""
+        k = self.n % len(self.pbos)
+        if self.n >= len(self.pbos):
+            self._collect(k)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[k])
+        glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.n += 1
+
+    def _collect(self, k):
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pbos[k])
+        ptr = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        frame = np.ctypeslib.as_array(ctypes.cast(ptr, ctypes.POINTER(ctypes.c_ubyte)), (self.height, self.width, 4)).copy()
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.sink.put(frame)
+
+    def finish(self):
+        """Collect the frames still in flight, in order."""
+        depth = len(self.pbos)
+        for i in range(max(0, self.n - depth), self.n):
+            self._collect(i % depth)
+
+# ---------- Writers ----------
+_Y = np.array([0.299, 0.587, 0.114], np.float32)
+_CBCR = np.array([[-0.168736, 0.5], [-0.331264, -0.418688], [0.5, -0.081312]], np.float32) * 0.25
+
+def rgb_to_yuv420(rgb):
+    """Full-range BT.601 (JPEG) Y, Cb, Cr planes; chroma averaged over 2x2 blocks."""
+    h, w, _ = rgb.shape
+    y = rgb.reshape(-1, 3).astype(np.float32) @ _Y
+    # 2x2 sums from strided views (a reshape-and-sum is many times slower); _CBCR carries the / 4
+    quad = rgb[0::2, 0::2].astype(np.uint16) + rgb[0::2, 1::2] + rgb[1::2, 0::2] + rgb[1::2, 1::2]
+    cbcr = quad.reshape(-1, 3).astype(np.float32) @ _CBCR + 128.5
+    y += 0.5
+    return [np.clip(p, 0, 255).astype(np.uint8).reshape(sh)
+            for p, sh in ((y, (h, w)), (cbcr[:, 0], (h // 2, w // 2)), (cbcr[:, 1], (h // 2, w // 2)))]
+
+def png_bytes(rgb):
+    h, w, _ = rgb.shape
+    rows = np.empty((h, 1 + 3 * w), dtype=np.uint8)
+    rows[:, 0] = 0                     # filter type None on every row
+    rows[:, 1:] = rgb.reshape(h, 3 * w)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), 1)) + chunk(b"IEND", b""))
+
+class FrameWriter:
+    """Encodes frames on a background thread.
+
+    `path` ending in .y4m is a YUV4MPEG2 4:2:0 video, .rgb raw RGB24 frames
+    back to back, and a path with a % field (frames/%05d.png or .ppm) one
+    image per frame. Frames arrive bottom-up RGBA, as glReadPixels gives them.
+    If encoding or writing fails, the thread keeps draining the queue and the
+    error is raised from the next `put` or from `close`.
+    """
+
+    def __init__(self, path, width, height, fps):
+        self.path, self.width, self.height, self.fps = path, width, height, fps
+        ext = os.path.splitext(path)[1].lower()
+        if "%" in path:
+            if ext not in (".png", ".ppm"):
+                raise ValueError("an image sequence needs a .png or .ppm pattern")
+            self.kind = ext[1:]
+            try:
+                path % 0
+            except (TypeError, ValueError):
+                raise ValueError("an image sequence needs a single %d field, like frames/%05d.png") from None
+        elif ext in (".y4m", ".rgb"):
+            self.kind = ext[1:]
+            if self.kind == "y4m" and (width % 2 or height % 2):
+                raise ValueError("Y4M 4:2:0 needs an even width and height")
+        else:
+            raise ValueError("output must be .y4m, .rgb or an image pattern like frames/%05d.png")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.frames = 0
+        self.error = None
+        self.q = queue.Queue(WRITE_QUEUE)
+        self.f = None
+        if self.kind in ("y4m", "rgb"):
+            self.f = open(path, "wb")
+            if self.kind == "y4m":
+                self.f.write(f"YUV4MPEG2 W{width} H{height} F{fps}:1 Ip A1:1 C420jpeg\n".encode())
+        self.thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, frame):
+        if self.error is not None:
+            raise self.error
+        self.q.put(frame)
+
+    def close(self):
+        self.q.put(None)
+        self.thread.join()
+        if self.f is not None:
+            self.f.close()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            frame = self.q.get()
+            if frame is None:
+                return
+            if self.error is not None:
+                continue             # failed: keep draining so put() never blocks on a full queue
+            try:
+                self._write(frame)
+            except Exception as e:
+                self.error = e
+
+    def _write(self, frame):
+        rgb = np.ascontiguousarray(frame[::-1, :, :3])
+        if self.kind == "y4m":
+            self.f.write(b"FRAME\n")
+            for plane in rgb_to_yuv420(rgb):
+                self.f.write(plane.tobytes())
+        elif self.kind == "rgb":
+            self.f.write(rgb.tobytes())
+        else:
+            with open(self.path % self.frames, "wb") as out:
+                if self.kind == "png":
+                    out.write(png_bytes(rgb))
+                else:
+                    out.write(b"P6 %d %d 255\n" % (self.width, self.height) + rgb.tobytes())
+        self.frames += 1
+
+# ---------- Runner ----------
+def render(game, world, frames, fps, capture, policy=None, end_tick=None, log=print):
+    """Draw up to `frames` frames, the world's ManualClock advanced 1/fps s before each one.
+
+    Stops after the replay's last tick (`end_tick`) or, for a policy run, a
+    second after the match freezes. Returns frames drawn.
+    """
+    game.world = world
+    world.on_camera = game.apply_camera
+    clock = world.clock
+    frozen_for = 0
+    n = 0
+    t0 = time.perf_counter()
+    while n < frames:
+        if policy is not None:
+            policy(world)
+        clock.advance(1000.0 / fps)
+        world.advance()
+        game.showScreen()
+        capture.grab()
+        n += 1
+        if end_tick is not None and world.tick_count >= end_tick:
+            break
+        frozen_for = frozen_for + 1 if world.frozen else 0
+        if frozen_for > fps:
+            break
+    capture.finish()
+    wall = time.perf_counter() - t0
+    log(f"frames={n} wall_s={wall:.2f} fps={n / wall:.1f} realtime_x={n / fps / wall:.2f} ticks={world.tick_count}")
+    return n
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render Battle Tanks frames without a window")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--replay", metavar="PATH", help="render a recording (replay.py / --record)")
+    src.add_argument("--policy", choices=sorted(POLICIES), help="render a new match played by a headless policy")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--stress", type=int, default=0, metavar="N")
+    ap.add_argument("--levels", metavar="PATH", help="level definitions to play, or that a --replay was recorded with")
+    ap.add_argument("--out", required=True, help="match.y4m, match.rgb or frames/%%05d.png (.ppm)")
+    ap.add_argument("--size", default="1000x800", help="WxH pixels")
+    ap.add_argument("--fps", type=int, default=60)
+    ap.add_argument("--seconds", type=float, default=None, help="stop after this much match time")
+    ap.add_argument("--first-person", action="store_true")
+    args = ap.parse_args(argv)
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    clock = ManualClock()
+    end_tick = None
+    policy = None
+    levels = None
+    if args.levels:
+        from levels import load_levels
+        levels = load_levels(args.levels)
+    if args.replay:
+        rec = Replay.load(args.replay)
+        world = rec.make_world(clock=clock, levels=levels)
+        end_tick = rec.end_tick
+        seconds = args.seconds if args.seconds is not None else end_tick * rec.tick_ms / 1000.0
+    else:
+        world = World(seed=args.seed, clock=clock, levels=levels)
+        if args.stress:
+            world.set_stress(args.stress)
+        policy = POLICIES[args.policy or "aim"]
+        if isinstance(policy, type):
+            policy = policy(world.seed)
+        seconds = args.seconds if args.seconds is not None else 60.0
+    world.advance()
+    try:
+        writer = FrameWriter(args.out, width, height, args.fps)
+    except (ValueError, OSError) as e:
+        ap.error(str(e))
+    context = make_context(width, height)
+    Framebuffer(width, height)
+    game = load_game(width, height)
+    game.camera_mode_first_person = args.first_person
+    renderer = glGetString(GL_RENDERER).decode()
+    try:
+        render(game, world, int(math.ceil(seconds * args.fps)), args.fps, FrameCapture(width, height, writer),
+               policy=policy, end_tick=end_tick)
+    finally:
+        try:
+            writer.close()
+        finally:
+            context.close()
+    print(f"wrote {writer.frames} frames to {args.out} ({renderer}, seed {world.seed})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# Battle Tanks — frame pacing
+# Frame deadlines on a high-resolution clock for a capped frame rate. The
+# front end asks how long to wait until the next deadline and sleeps that
+# long in a GLUT timer instead of redrawing from a busy idle callback.
+import time
+
+DEFAULT_FPS = 60
+
+class FramePacer:
+    """Deadlines `1 / fps` apart; fps <= 0 means uncapped (never wait).
+
+    Deadlines advance by whole periods from the first frame, so rounding the
+    wait to timer milliseconds never accumulates into drift. A frame that
+    starts more than a period late restarts the schedule from now instead of
+    running a burst of frames to catch up.
+    """
+
+    def __init__(self, fps=DEFAULT_FPS, clock=time.perf_counter):
+        self.clock = clock
+        self.set_fps(fps)
+
+    def set_fps(self, fps):
+        self.fps = fps
+        self.period = 1.0 / fps if fps > 0 else 0.0
+        self.deadline = None
+
+    def frame_started(self):
+        """Call at the start of each frame: sets the next frame's deadline."""
+        now = self.clock()
+        if self.deadline is None or now - self.deadline > self.period:
+            self.deadline = now
+        self.deadline += self.period
+
+    def delay_ms(self):
+        """Whole milliseconds until the next deadline (0 if it has passed or uncapped)."""
+        if self.deadline is None:
+            return 0
+        return max(0, int((self.deadline - self.clock()) * 1000.0))
+
+    def restart(self):
+        """Forget the schedule (after the front end stopped drawing for a while)."""
+        self.deadline = None
@@ -0,0 +1,95 @@
+# Battle Tanks — per-stage frame timers
+# Stages are timed as laps: each lap() charges the time since the previous
+# one to a stage. A frame's row (sim stages summed over that frame's ticks,
+# then draw stages) goes into a rolling ring buffer and, optionally, a CSV.
+import time
+import numpy as np
+
+SIM_STAGES = ("player", "projectiles", "collision", "enemies", "miniboss1", "miniboss2", "miniboss3",
+              "final_boss", "beams", "banners")
+DRAW_STAGES = ("ground", "walls", "tanks", "bullets", "hud")
+
+def no_lap(stage):
+    """Stand-in for FrameTimers.lap while timing is off."""
+
+class FrameTimers:
+    """Ring buffer of the last `capacity` frames: ms per stage, ticks run and frame time.
+
+    `frame_ms` is wall time between `end_frame` calls, so it includes waiting
+    for the next frame as well as the stages.
+    """
+
+    def __init__(self, stages=SIM_STAGES + DRAW_STAGES, capacity=600):
+        self.stages = tuple(stages)
+        self.index = {s: i for i, s in enumerate(self.stages)}
+        self.capacity = capacity
+        self.ms = np.zeros((capacity, len(self.stages)))
+        self.frame_ms = np.zeros(capacity)
+        self.ticks = np.zeros(capacity, dtype=np.intp)
+        self.n = 0                 # frames recorded so far (the ring holds the last `capacity`)
+        self._row = np.zeros(len(self.stages))
+        self._ticks = 0
+        self._t = time.perf_counter()
+        self._t_frame = None
+        self._csv = None
+        self._t_csv0 = None
+
+    # ---------- Timing ----------
+    def restart(self):
+        """Start the next lap now (time since the last lap is not charged anywhere)."""
+        self._t = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self._row[self.index[stage]] += now - self._t
+        self._t = now
+
+    def tick_done(self):
+        self._ticks += 1
+
+    def end_frame(self):
+        now = time.perf_counter()
+        k = self.n % self.capacity
+        self.ms[k] = self._row * 1e3
+        self.frame_ms[k] = (now - self._t_frame) * 1e3 if self._t_frame is not None else 0.0
+        self.ticks[k] = self._ticks
+        if self._csv is not None:
+            self._write_row(k, now)
+        self.n += 1
+        self._row[:] = 0.0
+        self._ticks = 0
+        self._t_frame = now
+
+    # ---------- Stats ----------
+    def recent(self):
+        """(ms, frame_ms) for the frames in the buffer, oldest first."""
+        m = min(self.n, self.capacity)
+        order = (np.arange(m) + self.n - m) % self.capacity
+        return self.ms[order], self.frame_ms[order]
+
+    def summary(self):
+        """[(stage, mean ms, p99 ms)] over the buffered frames, plus ("frame", ...)."""
+        ms, frame_ms = self.recent()
+        if len(ms) == 0:
+            return []
+        mean = ms.mean(axis=0)
+        p99 = np.percentile(ms, 99, axis=0)
+        rows = [(s, float(a), float(b)) for s, a, b in zip(self.stages, mean, p99)]
+        rows.append(("frame", float(frame_ms.mean()), float(np.percentile(frame_ms, 99))))
+        return rows
+
+    # ---------- CSV export ----------
+    def open_csv(self, path):
+        """Append every following frame to `path` as CSV (one header line, ms columns)."""
+        self._csv = open(path, "w")
+        self._t_csv0 = time.perf_counter()
+        self._csv.write(",".join(("frame", "time_s", "frame_ms", "ticks") + tuple(f"{s}_ms" for s in self.stages)) + "\n")
+
+    def _write_row(self, k, now):
+        vals = ",".join(f"{v:.4f}" for v in self.ms[k].tolist())
+        self._csv.write(f"{self.n},{now - self._t_csv0:.4f},{self.frame_ms[k]:.4f},{self.ticks[k]},{vals}\n")
+
+    def close_csv(self):
+        if self._csv is not None:
+            self._csv.close()
+            self._csv = None
@@ -0,0 +1,223 @@
+# Battle Tanks — struct-of-arrays projectile store
+# Every bullet in flight (player + all enemy kinds) lives in one set of
+# contiguous NumPy columns; `owner` says who fired it.
+import math, struct
+import numpy as np
+
+# ---------- Owners ----------
+OWNER_PLAYER = 0
+OWNER_ENEMY = 1   # basic enemies
+OWNER_MB1 = 2
+OWNER_MB2 = 3
+OWNER_MB3 = 4
+OWNER_FB = 5
+N_OWNERS = 6
+
+class ProjectileStore:
+    """Positions, velocities, TTL, size and owner for all live projectiles.
+
+    Rows [0, n) are live and packed; removal compacts the tail down so the
+    order of the survivors (fire order) is kept. `version` changes whenever
+    rows move, so index-based caches (the collision grid) know to rebuild.
+    (x0, y0) is where each row started the last `integrate`: hit tests sweep
+    the segment x0 -> x so fast bullets cannot skip past a target between
+    ticks. Rows spawned since then have x0 == x. `max_step` bounds the
+    segment length.
+    """
+
+    def __init__(self, capacity=256):
+        self.n = 0
+        self.version = 0
+        self.max_step = 0.0
+        self._alloc(capacity)
+
+    def _alloc(self, cap):
+        self._x = np.zeros(cap)
+        self._y = np.zeros(cap)
+        self._x0 = np.zeros(cap)
+        self._y0 = np.zeros(cap)
+        self._z = np.zeros(cap)
+        self._vx = np.zeros(cap)
+        self._vy = np.zeros(cap)
+        self._ttl = np.zeros(cap)
+        self._size = np.zeros(cap)
+        self._owner = np.zeros(cap, dtype=np.int8)
+
+    def _columns(self):
+        return (self._x, self._y, self._x0, self._y0, self._z, self._vx, self._vy, self._ttl, self._size, self._owner)
+
+    def _grow(self):
+        old = self._columns()
+        n = self.n
+        self._alloc(max(16, len(self._x) * 2))
+        for dst, src in zip(self._columns(), old):
+            dst[:n] = src[:n]
+
+    # ---------- Views over live rows ----------
+    @property
+    def x(self):
+        return self._x[:self.n]
+
+    @property
+    def y(self):
+        return self._y[:self.n]
+
+    @property
+    def x0(self):
+        return self._x0[:self.n]
+
+    @property
+    def y0(self):
+        return self._y0[:self.n]
+
+    @property
+    def z(self):
+        return self._z[:self.n]
+
+    @property
+    def vx(self):
+        return self._vx[:self.n]
+
+    @property
+    def vy(self):
+        return self._vy[:self.n]
+
+    @property
+    def ttl(self):
+        return self._ttl[:self.n]
+
+    @property
+    def size(self):
+        return self._size[:self.n]
+
+    @property
+    def owner(self):
+        return self._owner[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    # ---------- Spawn / remove ----------
+    def spawn(self, x, y, z, vx, vy, ttl, size, owner):
+        if self.n == len(self._x):
+            self._grow()
+        i = self.n
+        self._x[i] = self._x0[i] = x
+        self._y[i] = self._y0[i] = y
+        self._z[i] = z
+        self._vx[i] = vx
+        self._vy[i] = vy
+        self._ttl[i] = ttl
+        self._size[i] = size
+        self._owner[i] = owner
+        self.n = i + 1
+        self.version += 1
+
+    def spawn_many(self, x, y, z, vx, vy, ttl, size, owner):
+        """`spawn` for a batch: x .. vy are equal-length arrays, the rest may be scalars."""
+        k = len(x)
+        while self.n + k > len(self._x):
+            self._grow()
+        s, e = self.n, self.n + k
+        self._x[s:e] = self._x0[s:e] = x
+        self._y[s:e] = self._y0[s:e] = y
+        self._z[s:e] = z
+        self._vx[s:e] = vx
+        self._vy[s:e] = vy
+        self._ttl[s:e] = ttl
+        self._size[s:e] = size
+        self._owner[s:e] = owner
+        self.n = e
+        self.version += 1
+
+    def _keep(self, keep):
+        """Compact rows where `keep` (bool, length n) is True."""
+        m = int(np.count_nonzero(keep))
+        if m == self.n:
+            return
+        for col in self._columns():
+            col[:m] = col[:self.n][keep]
+        self.n = m
+        self.version += 1
+
+    def remove(self, idx):
+        """Drop the rows in `idx` (any int sequence of live indices)."""
+        if len(idx) == 0:
+            return
+        keep = np.ones(self.n, dtype=bool)
+        keep[np.asarray(idx, dtype=np.intp)] = False
+        self._keep(keep)
+
+    def clear(self, owner=None):
+        if owner is None:
+            self.n = 0
+            self.version += 1
+        else:
+            self._keep(self.owner != owner)
+
+    def count(self, owner=None):
+        if owner is None:
+            return self.n
+        return int(np.count_nonzero(self.owner == owner))
+
+    def owned(self, owner):
+        """Indices of live rows fired by `owner`, in fire order."""
+        return np.flatnonzero(self.owner == owner)
+
+    # ---------- Snapshot ----------
+    _HEAD = struct.Struct("<Id")   # n, max_step
+
+    def to_bytes(self):
+        n = self.n
+        return self._HEAD.pack(n, self.max_step) + b"".join(col[:n].tobytes() for col in self._columns())
+
+    def load_bytes(self, buf, pos):
+        """Replace the contents from `to_bytes` output at buf[pos:]; returns the end offset."""
+        n, self.max_step = self._HEAD.unpack_from(buf, pos)
+        pos += self._HEAD.size
+        if n > len(self._x):
+            self._alloc(n)
+        for col in self._columns():
+            col[:n] = np.frombuffer(buf, col.dtype, n, pos)
+            pos += n * col.itemsize
+        self.n = n
+        self.version += 1
+        return pos
+
+    # ---------- Integration ----------
+    def integrate(self, dt_ms):
+        """Move and age every projectile; the old position is kept in (x0, y0).
+
+        Culling is left to `cull`, after this tick's hit tests have seen the
+        whole swept segment (a bullet crossing a tank on its way into the wall
+        still hits it).
+        """
+        n = self.n
+        if n == 0:
+            self.max_step = 0.0
+            return
+        f = dt_ms / 16.0
+        x = self._x[:n]
+        y = self._y[:n]
+        vx = self._vx[:n]
+        vy = self._vy[:n]
+        self._x0[:n] = x
+        self._y0[:n] = y
+        x += vx * f
+        y += vy * f
+        self._ttl[:n] -= dt_ms
+        self.max_step = math.sqrt(float((vx*vx + vy*vy).max())) * f
+        self.version += 1
+
+    def cull(self, wall_limit):
+        """Drop expired rows and rows outside the arena."""
+        if self.n == 0:
+            return
+        x, y = self.x, self.y
+        self._keep((self.ttl > 0) & (np.abs(x) < wall_limit) & (np.abs(y) < wall_limit))
+
+    def within(self, cx, cy, r, owner):
+        """Indices (fire order) of `owner` rows whose centre is within r of (cx, cy)."""
+        dx = self.x - cx
+        dy = self.y - cy
+        return np.flatnonzero((self.owner == owner) & (dx*dx + dy*dy <= r * r))
@@ -0,0 +1,198 @@
+# Battle Tanks — input recording and replay
+# A recording is the match seed plus every input event, tagged with the tick
+# that applied it, and a state keyframe every few seconds. Replaying feeds the
+# same events into a World at the same ticks, which reproduces the match
+# exactly; seeking restores the nearest keyframe and replays from there. The
+# header holds a digest of the level set, so a match recorded on other levels
+# is refused instead of drifting.
+#
+#   python replay.py match.btr [--levels custom.json] [--seek TICK] [--verify]
+import argparse, bisect, struct, sys, time
+from tank_sim import World, ManualClock, DEFAULT_LEVELS
+from levels import load_levels, levels_digest
+
+MAGIC = b"BTRP"
+VERSION = 4
+_HEADER = struct.Struct("<4sBqdI16s")   # magic, version, seed, tick_ms, keyframe_every, levels_digest
+KEYFRAME_EVERY = 600                 # ticks (10 s at 60 Hz)
+
+# ---------- Chunk tags ----------
+TAG_EVENTS = b"E"    # varint tick, varint count, count x (code u8, arg u8)
+TAG_KEYFRAME = b"K"  # varint tick, varint length, World.snapshot() bytes
+TAG_END = b"Z"       # varint tick: last tick of the recording
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+def _read_varint(buf, pos):
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return n, pos
+        shift += 7
+
+class Recorder:
+    """Writes a World's input log to `path`; install as `world.recorder`.
+
+    The World calls `record` with each tick's events and `tick_done` after
+    each tick. `close(world)` ends the file with a final keyframe.
+    """
+
+    def __init__(self, path, world, keyframe_every=KEYFRAME_EVERY):
+        self.f = open(path, "wb")
+        self.keyframe_every = keyframe_every
+        self.f.write(_HEADER.pack(MAGIC, VERSION, world.seed, world.tick_ms, keyframe_every,
+                                  levels_digest(world.campaign_levels)))
+        self._keyframe(world)
+
+    def _keyframe(self, world):
+        blob = world.snapshot()
+        self.f.write(TAG_KEYFRAME + _varint(world.tick_count) + _varint(len(blob)) + blob)
+
+    def record(self, tick, events):
+        self.f.write(TAG_EVENTS + _varint(tick) + _varint(len(events)) + bytes(b for ev in events for b in ev))
+
+    def tick_done(self, world):
+        if world.tick_count % self.keyframe_every == 0:
+            self._keyframe(world)
+            self.f.flush()
+
+    def close(self, world):
+        if self.f.closed:
+            return
+        if world.tick_count % self.keyframe_every:
+            self._keyframe(world)
+        self.f.write(TAG_END + _varint(world.tick_count))
+        self.f.close()
+
+class Replay:
+    """A parsed recording: seed, tick length, level set digest, events by tick and keyframes."""
+
+    def __init__(self, data):
+        magic, version, self.seed, self.tick_ms, self.keyframe_every, self.levels_digest = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} Battle Tanks replay")
+        self.events = {}
+        self.keyframe_ticks = []
+        self.keyframes = []
+        self.end_tick = 0
+        pos = _HEADER.size
+        while pos < len(data):
+            tag = data[pos:pos + 1]
+            tick, pos = _read_varint(data, pos + 1)
+            if tag == TAG_EVENTS:
+                count, pos = _read_varint(data, pos)
+                raw = data[pos:pos + 2 * count]
+                self.events[tick] = [(raw[i], raw[i + 1]) for i in range(0, len(raw), 2)]
+                pos += 2 * count
+            elif tag == TAG_KEYFRAME:
+                size, pos = _read_varint(data, pos)
+                self.keyframe_ticks.append(tick)
+                self.keyframes.append(data[pos:pos + size])
+                pos += size
+            elif tag == TAG_END:
+                self.end_tick = tick
+            else:
+                raise ValueError(f"bad replay chunk {tag!r} at byte {pos}")
+        self.end_tick = max(self.end_tick, self.keyframe_ticks[-1], max(self.events, default=0))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def make_world(self, clock=None, levels=None):
+        """A World at the first keyframe (usually tick 0) that takes its input from this recording.
+
+        `levels` must be the level set the match was recorded on (default:
+        levels.json); a different one raises ValueError.
+        """
+        levels = levels if levels is not None else DEFAULT_LEVELS
+        if levels_digest(levels) != self.levels_digest:
+            raise ValueError("replay was recorded on a different level set (pass the --levels file it was recorded with)")
+        world = World(seed=self.seed, clock=clock or ManualClock(), tick_hz=1000.0 / self.tick_ms, levels=levels)
+        world.restore(self.keyframes[0])
+        world.input_source = self.feed
+        return world
+
+    def feed(self, world):
+        """World.input_source hook: queue the recorded events of the tick being run."""
+        for code, arg in self.events.get(world.tick_count, ()):
+            world.push_input(code, arg)
+
+    def step(self, world):
+        world.step(self.tick_ms)
+
+    def seek(self, world, tick):
+        """Bring `world` to the end of `tick`: nearest keyframe at or before it, then replay.
+
+        Raises ValueError for a tick outside the recording.
+        """
+        if not self.keyframe_ticks[0] <= tick <= self.end_tick:
+            raise ValueError(f"tick {tick} is outside the recording ({self.keyframe_ticks[0]}..{self.end_tick})")
+        k = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        start = self.keyframe_ticks[max(k, 0)]
+        if not start <= world.tick_count <= tick:
+            world.restore(self.keyframes[max(k, 0)])
+            world.clear_inputs()
+        while world.tick_count < tick:
+            self.step(world)
+        return world
+
+    def verify(self, levels=None):
+        """Replay from the first keyframe and compare against every later one.
+
+        Snapshots are canonical, so this is a byte compare. Returns None if the
+        replay matches the recording throughout, else the first keyframe tick
+        where the state differs.
+        """
+        world = self.make_world(levels=levels)
+        for tick, blob in zip(self.keyframe_ticks[1:], self.keyframes[1:]):
+            while world.tick_count < tick:
+                self.step(world)
+            if world.snapshot() != blob:
+                return tick
+        return None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inspect / verify a Battle Tanks replay")
+    ap.add_argument("path")
+    ap.add_argument("--levels", metavar="PATH", help="level definitions it was recorded with (default: levels.json)")
+    ap.add_argument("--seek", type=int, default=None, help="jump to this tick and print the state there")
+    ap.add_argument("--verify", action="store_true", help="replay the whole match and check every keyframe")
+    args = ap.parse_args(argv)
+    rep = Replay.load(args.path)
+    levels = load_levels(args.levels) if args.levels else None
+    n_events = sum(len(v) for v in rep.events.values())
+    print(f"seed={rep.seed} tick_ms={rep.tick_ms:.3f} ticks={rep.end_tick} events={n_events} keyframes={len(rep.keyframes)}")
+    try:
+        world = rep.make_world(levels=levels)
+    except ValueError as e:
+        ap.error(str(e))
+    if args.seek is not None:
+        if not rep.keyframe_ticks[0] <= args.seek <= rep.end_tick:
+            ap.error(f"--seek {args.seek} is outside the recording ({rep.keyframe_ticks[0]}..{rep.end_tick})")
+        t0 = time.perf_counter()
+        world = rep.seek(world, args.seek)
+        ms = (time.perf_counter() - t0) * 1e3
+        print(f"tick={world.tick_count} level={world.level_index} hits={world.player_hits_taken} "
+              f"kills={world.basic_kills} pos=({world.tank_pos[0]:.1f}, {world.tank_pos[1]:.1f}) seek_ms={ms:.1f}")
+    if args.verify:
+        bad = rep.verify(levels)
+        print("replay matches the recording" if bad is None else f"replay diverges by tick {bad}")
+        return 0 if bad is None else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
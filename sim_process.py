@@ -0,0 +1,239 @@
+# Battle Tanks — the simulation in its own process
+# The sim process owns the World. It ticks on its own clock and, after every
+# advance that ran ticks, publishes world.snapshot() into a shared-memory
+# double buffer (on a frozen game over / win screen, only when what it shows
+# changes). The GLUT process restores the newest snapshot into a mirror
+# World and only draws, so a slow tick delays the next state, never a frame.
+# Input goes the other way through a single-producer / single-consumer ring,
+# also in shared memory; neither side ever takes a lock.
+import multiprocessing, struct, time
+from multiprocessing import shared_memory
+from tank_sim import World, IN_CAMERA
+from levels import load_levels
+from replay import Replay, Recorder
+
+SLOT_BYTES = 8 << 20     # per snapshot slot; a 10k-enemy stress world is ~2.2 MB
+RING_EVENTS = 4096       # queued (IN_*, arg) events before the front end drops input (a power of two)
+
+def now_ms():
+    """perf_counter in ms: one system-wide monotonic clock on Linux and Windows, so both processes agree."""
+    return time.perf_counter() * 1000.0
+
+class StateBuffer:
+    """Two snapshot slots in shared memory, each guarded by its own sequence number.
+
+    The writer fills the slot the reader is not pointed at: its sequence goes
+    odd, the blob and its (alpha, time) stamp are written, the sequence goes
+    even again and `latest` flips to it. The reader copies the latest slot
+    and keeps the copy only if that slot's sequence was even and unchanged
+    across the copy, so it never sees a half-written state. (Plain stores
+    are enough for this on x86; the slot header is written last.)
+    """
+
+    _HEAD = struct.Struct("<II")          # latest slot, stop flag
+    _SLOT = struct.Struct("<QQdd")        # sequence, blob length, render alpha, publish time (ms)
+
+    def __init__(self, shm=None, slot_bytes=SLOT_BYTES):
+        size = self._HEAD.size + 2 * (self._SLOT.size + slot_bytes)
+        self.shm = shm or shared_memory.SharedMemory(create=True, size=size)
+        self.slot_bytes = (self.shm.size - self._HEAD.size) // 2 - self._SLOT.size
+        self.buf = self.shm.buf
+        self.seen = None                  # reader: (slot, sequence) of the last state taken
+
+    def __reduce__(self):
+        return (StateBuffer, (self.shm,))
+
+    def _slot(self, k):
+        return self._HEAD.size + k * (self._SLOT.size + self.slot_bytes)
+
+    def _head(self):
+        return self._HEAD.unpack_from(self.buf, 0)
+
+    # ---------- Writer (sim process) ----------
+    def publish(self, blob, alpha, t_ms):
+        if len(blob) > self.slot_bytes:
+            raise RuntimeError(f"world snapshot of {len(blob)} bytes does not fit a {self.slot_bytes} byte slot")
+        latest, stop = self._head()
+        k = 1 - latest
+        at = self._slot(k)
+        seq = self._SLOT.unpack_from(self.buf, at)[0]
+        self._SLOT.pack_into(self.buf, at, seq + 1, 0, 0.0, 0.0)
+        self.buf[at + self._SLOT.size:at + self._SLOT.size + len(blob)] = blob
+        self._SLOT.pack_into(self.buf, at, seq + 2, len(blob), alpha, t_ms)
+        self._HEAD.pack_into(self.buf, 0, k, stop)
+
+    def stopped(self):
+        return self._head()[1] != 0
+
+    # ---------- Reader (GLUT process) ----------
+    def take(self):
+        """(blob, alpha, t_ms) of a state newer than the last one taken, else None."""
+        for _ in range(4):
+            k = self._head()[0]
+            at = self._slot(k)
+            seq, n, alpha, t_ms = self._SLOT.unpack_from(self.buf, at)
+            if seq & 1 or seq == 0:
+                continue
+            if (k, seq) == self.seen:
+                return None
+            blob = bytes(self.buf[at + self._SLOT.size:at + self._SLOT.size + n])
+            if self._SLOT.unpack_from(self.buf, at)[0] == seq:
+                self.seen = (k, seq)
+                return blob, alpha, t_ms
+        return None
+
+    def stop(self):
+        self._HEAD.pack_into(self.buf, 0, self._head()[0], 1)
+
+class InputRing:
+    """(IN_*, arg) byte pairs in shared memory: the front end appends, the sim drains.
+
+    `head` is only written by the reader and `tail` only by the writer, each
+    after its data is in place, so no lock is needed for one of each.
+    """
+
+    _HEAD = struct.Struct("<II")          # head, tail (free-running counters)
+
+    def __init__(self, shm=None, capacity=RING_EVENTS):
+        self.shm = shm or shared_memory.SharedMemory(create=True, size=self._HEAD.size + 2 * capacity)
+        self.capacity = (self.shm.size - self._HEAD.size) // 2
+        self.buf = self.shm.buf
+
+    def __reduce__(self):
+        return (InputRing, (self.shm,))
+
+    def push(self, events):
+        """Append events; returns how many fit (the rest are dropped)."""
+        head, tail = self._HEAD.unpack_from(self.buf, 0)
+        n = min(len(events), self.capacity - ((tail - head) & 0xFFFFFFFF))
+        for code, arg in events[:n]:
+            at = self._HEAD.size + 2 * (tail % self.capacity)
+            self.buf[at] = code
+            self.buf[at + 1] = arg
+            tail += 1
+        struct.pack_into("<I", self.buf, 4, tail & 0xFFFFFFFF)
+        return n
+
+    def drain(self):
+        head, tail = self._HEAD.unpack_from(self.buf, 0)
+        events = []
+        while head != tail:
+            at = self._HEAD.size + 2 * (head % self.capacity)
+            events.append((self.buf[at], self.buf[at + 1]))
+            head = (head + 1) & 0xFFFFFFFF
+        struct.pack_into("<I", self.buf, 0, head)
+        return events
+
+# ---------- Sim process ----------
+def make_world(clock, levels_path=None, stress_n=None, replay_path=None):
+    """The World the front end would run for these command-line options."""
+    levels = load_levels(levels_path) if levels_path else None
+    if replay_path:
+        return Replay.load(replay_path).make_world(clock=clock, levels=levels)
+    world = World(clock=clock, levels=levels)
+    if stress_n:
+        world.set_stress(int(stress_n))
+    return world
+
+def _frozen_view(world):
+    """What a frozen (game over / won) world can still change besides its tick count and time."""
+    return (world.game_over_freeze, world.game_win_freeze, world.cheat_invincible, world.cheat_no_cooldown,
+            frozenset(world.keys_down))
+
+def sim_main(state, inputs, options, record_path=None):
+    """Process target: tick the world at its fixed rate, publishing after every advance that ran ticks.
+
+    While the world stays frozen nothing but the tick count moves, so once a
+    state ticked entirely frozen (its interpolation poses settled) is out,
+    the next one is only published when `_frozen_view` changes. The
+    renderer then has nothing new to restore and can sleep.
+    """
+    world = make_world(now_ms, **options)
+    recorder = None
+    if record_path:
+        recorder = world.recorder = Recorder(record_path, world)
+    parent = multiprocessing.parent_process()
+    tick_s = world.tick_ms / 1000.0
+    state.publish(world.snapshot(), 0.0, now_ms())
+    deadline = time.perf_counter()
+    shown = None          # _frozen_view of the last published state, once it ticked frozen throughout
+    try:
+        while not state.stopped() and (parent is None or parent.is_alive()):
+            for code, arg in inputs.drain():
+                world.push_input(code, arg)
+            was_frozen = world.frozen
+            if world.advance():
+                view = _frozen_view(world) if world.frozen else None
+                if view is None or view != shown:
+                    state.publish(world.snapshot(), world.render_alpha(), now_ms())
+                shown = view if was_frozen else None
+            deadline += tick_s
+            wait = deadline - time.perf_counter()
+            if wait > 0.0:
+                time.sleep(wait)
+            elif wait < -tick_s:
+                deadline = time.perf_counter()
+    finally:
+        if recorder is not None:
+            recorder.close(world)
+
+class SimProcess:
+    """Front-end handle: starts the sim process and keeps a mirror World in step with it."""
+
+    def __init__(self, options, record_path=None):
+        self.state = StateBuffer()
+        self.inputs = InputRing()
+        self.tick_ms = None
+        self.alpha = 0.0
+        self.t_ms = None
+        self.unsent = []      # input the ring had no room for; sent first next frame
+        ctx = multiprocessing.get_context("spawn")
+        self.proc = ctx.Process(target=sim_main, args=(self.state, self.inputs, options, record_path),
+                                name="battle-tanks-sim", daemon=True)
+        self.proc.start()
+
+    def sync(self, world, on_camera=None):
+        """Forward the mirror's queued input to the sim, then load the newest published state.
+
+        Camera events are also applied here at once (`on_camera`), since the
+        camera lives in this process. Input that does not fit the ring is kept
+        and sent, in order, on a later call. Returns True if a new state was
+        loaded; raises RuntimeError once the sim process has died.
+        """
+        events = world.take_inputs()
+        if on_camera is not None:
+            for code, arg in events:
+                if code == IN_CAMERA:
+                    on_camera(arg)
+        if self.unsent:
+            events = self.unsent + events
+        if events:
+            self.unsent = events[self.inputs.push(events):]
+        got = self.state.take()
+        if got is None:
+            if not self.proc.is_alive():
+                raise RuntimeError(f"the sim process exited (exit code {self.proc.exitcode}); see its error above")
+            return False
+        blob, self.alpha, self.t_ms = got
+        world.restore(blob)
+        self.tick_ms = world.tick_ms
+        return True
+
+    def render_alpha(self):
+        """Fraction of a tick since the newest state was ticked, extrapolated to now."""
+        if self.t_ms is None:
+            return 0.0
+        return min(1.0, self.alpha + (now_ms() - self.t_ms) / self.tick_ms)
+
+    def close(self, timeout=2.0):
+        """Stop the sim process (it closes its recording) and free the shared memory; safe to call twice."""
+        if self.proc is None:
+            return
+        self.state.stop()
+        self.proc.join(timeout)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        for shm in (self.state.shm, self.inputs.shm):
+            shm.close()
+            shm.unlink()
+        self.proc = None
@@ -0,0 +1,68 @@
+# Battle Tanks — uniform-grid spatial hash (broadphase)
+# Points are binned into square cells over the arena with a counting sort;
+# a query returns every point in the cells its circle touches.
+import math
+import numpy as np
+
+class SpatialHash:
+    """Static grid over [-half_extent, half_extent]^2, rebuilt from point arrays.
+
+    Points outside the arena are clamped into the border cells, so queries near
+    the walls still see them.
+    """
+
+    def __init__(self, cell, half_extent):
+        self.cell = float(cell)
+        self.origin = -float(half_extent)
+        self.dim = max(1, int(math.ceil(2.0 * half_extent / self.cell)))
+        self.order = np.zeros(0, dtype=np.intp)
+        self.starts = np.zeros(self.dim * self.dim + 1, dtype=np.intp)
+
+    def _cells(self, v):
+        c = ((np.asarray(v, dtype=float) - self.origin) / self.cell).astype(np.intp)
+        # truncation == floor here: anything left of the origin clamps to cell 0
+        return np.minimum(np.maximum(c, 0), self.dim - 1)
+
+    def build(self, x, y):
+        """Bin points (x[i], y[i]); point ids are their indices in x / y."""
+        key = self._cells(y) * self.dim + self._cells(x)
+        self.order = np.argsort(key, kind="stable")
+        counts = np.bincount(key, minlength=self.dim * self.dim)
+        self.starts = np.zeros(self.dim * self.dim + 1, dtype=np.intp)
+        np.cumsum(counts, out=self.starts[1:])
+
+    def query_pairs(self, qx, qy, r):
+        """Candidate (query_index, point_index) pairs for circles of radius r.
+
+        Every point within r of a query centre is included; so are some that
+        are not, and the caller does the exact distance test.
+        """
+        qx = np.atleast_1d(np.asarray(qx, dtype=float))
+        qy = np.atleast_1d(np.asarray(qy, dtype=float))
+        k = int(math.ceil(r / self.cell))
+        cx = self._cells(qx)
+        cy = self._cells(qy)
+        # cells of one row are contiguous in key order: one [start, end) span per row
+        x0 = np.maximum(cx - k, 0)
+        x1 = np.minimum(cx + k, self.dim - 1)
+        q_ids = []
+        spans_s = []
+        spans_e = []
+        for oy in range(-k, k + 1):
+            row = cy + oy
+            ok = (row >= 0) & (row < self.dim)
+            base = row * self.dim
+            q_ids.append(np.flatnonzero(ok))
+            spans_s.append(self.starts[(base + x0)[ok]])
+            spans_e.append(self.starts[(base + x1)[ok] + 1])
+        q_ids = np.concatenate(q_ids)
+        s = np.concatenate(spans_s)
+        lens = np.concatenate(spans_e) - s
+        total = int(lens.sum())
+        if total == 0:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        # expand the spans: position = span start + offset within span
+        first = np.cumsum(lens) - lens
+        pos = np.repeat(s - first, lens) + np.arange(total)
+        return np.repeat(q_ids, lens), self.order[pos]
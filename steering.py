@@ -0,0 +1,29 @@
+# Battle Tanks — batched steering kernel
+# Face the player, close to a standoff ring (or just chase), clamp to the arena:
+# one array pass for any number of tanks.
+import numpy as np
+
+def steer(x, y, hx, hy, speed, tx, ty, f, standoff_r=0.0, deadband=0.0, back_scale=0.0, bound=None):
+    """Turn every tank toward (tx, ty) and move it; x, y and heading (hx, hy) updated in place.
+
+    `speed` is per 16 ms frame (array or scalar) and f = dt_ms / 16. Tanks
+    farther than standoff_r + deadband advance one step along their new yaw;
+    closer than standoff_r - deadband they back off `back_scale` of a step.
+    The heading is the unit vector to the target, +X when on top of it.
+    With the defaults a tank just chases. `bound` clamps |x|, |y|.
+    """
+    dx = tx - x
+    dy = ty - y
+    d = np.hypot(dx, dy)
+    on_top = d <= 0.0
+    inv = 1.0 / np.where(on_top, 1.0, d)
+    hx[:] = np.where(on_top, 1.0, dx * inv)
+    hy[:] = dy * inv
+    step = speed * f
+    move = np.where(d > standoff_r + deadband, step,
+                    np.where(d < standoff_r - deadband, -back_scale * step, 0.0))
+    x += hx * move
+    y += hy * move
+    if bound is not None:
+        np.minimum(np.maximum(x, -bound, out=x), bound, out=x)
+        np.minimum(np.maximum(y, -bound, out=y), bound, out=y)
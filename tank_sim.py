@@ -0,0 +1,1430 @@
+# Battle Tanks — headless simulation core (no GL / GLUT)
+# All game logic lives on World; the GLUT front end only feeds input and draws.
+import argparse, math, random, struct, sys, time
+import numpy as np
+from spatial_hash import SpatialHash
+from separation import separate_points
+from steering import steer
+from heading import heading, toward, rotate, rotations, rel_deg, lerp, yaw_deg
+from enemy_store import EnemyStore
+from beams import BeamStore
+from entities import MiniBoss1, MiniBoss2, MiniBoss3, Clone, FinalBoss
+from geometry import point_segment_dist2_np
+from levels import load_levels, stress_level
+from perf import no_lap
+from projectile_store import (ProjectileStore, N_OWNERS, OWNER_PLAYER, OWNER_ENEMY,
+                              OWNER_MB1, OWNER_MB2, OWNER_MB3, OWNER_FB)
+
+# ---------- World ----------
+GRID_LENGTH = 600
+
+# ---------- Simulation rate ----------
+TICK_HZ = 60                # fixed simulation rate (60 / 120 ...); rendering interpolates between ticks
+MAX_CATCHUP_TICKS = 5       # per advance(); a longer hitch drops time instead of spiralling
+# --- FIX: Single constant used everywhere to make bullets disappear at the arena walls ---
+BULLET_WALL_LIMIT = GRID_LENGTH - 8.0
+
+# movement parameters (tweak as needed)
+max_speed = 4.0
+accel = 0.18
+decel = 0.22
+friction = 0.08
+turn_speed = 2.6
+strafe_speed = 3.0
+
+# ---------- Game flags / counters ----------
+PLAYER_MAX_HITS = 10        # player can take this many hits before freeze
+
+# ---------- Basic enemies ----------
+EN_HULL_W, EN_HULL_H, EN_HULL_D = 52.0, 20.0, 34.0
+EN_TURRET_W, EN_TURRET_H, EN_TURRET_D = 19.0, 8.0, 19.0
+EN_BARREL_L, EN_BARREL_H, EN_BARREL_D = 30.0, 4.0, 4.0
+EN_TURRET_Z  = 11.0
+EN_TREAD_Z   = -10.0
+MIN_SEP = 46.0
+EN_STANDOFF_R = 140.0
+STANDOFF_DEADBAND = 8.0
+CROWD_RADIUS = 150.0
+EN_BULLET_SPEED = 7.0
+EN_BULLET_TTL   = 4200
+# wave layouts, speeds and fire cooldowns per level: levels.json (see levels.py)
+
+# ---------- MiniBoss1 (10 HP) ----------
+MB1_HULL_W, MB1_HULL_H, MB1_HULL_D = 64.0, 24.0, 42.0
+MB1_TURRET_W, MB1_TURRET_H, MB1_TURRET_D = 24.0, 10.0, 24.0
+MB1_BARREL_L, MB1_BARREL_H, MB1_BARREL_D = 38.0, 5.0, 5.0
+MB1_TURRET_Z = 14.0
+MB1_TREAD_Z  = -12.0
+MB1_SPEED_BASE = 0.6
+MB1_TURN_BASE  = 28.0
+MB1_BULLET_SPEED_BASE = 10.0
+MB1_FIRE_CD_MS_BASE   = 900
+MB1_BULLET_TTL   = 5200
+MB1_HP_SEGMENTS = 10
+
+# ---------- MiniBoss2 (Level 2) ----------
+MB2_HULL_W, MB2_HULL_H, MB2_HULL_D = 64.0, 24.0, 42.0
+MB2_TURRET_W, MB2_TURRET_H, MB2_TURRET_D = 24.0, 10.0, 24.0
+MB2_BARREL_L, MB2_BARREL_H, MB2_BARREL_D = 38.0, 5.0, 5.0
+MB2_TURRET_Z = 14.0
+MB2_TREAD_Z = -12.0
+MB2_HP_SEGMENTS = 5
+MB2_FIRE_CD_MS = 1200
+MB2_BULLET_SPEED = 18.0
+MB2_BULLET_TTL = 6000
+MB2_AURA_RADIUS = 120.0
+MB2_AURA_TICK_MS = 1000
+MB2_AURA_DAMAGE = 2
+MB2_TURRET_TURN = 24.0
+
+# ---------- MiniBoss3 (Level 3, Twins) ----------
+MB3_HULL_W, MB3_HULL_H, MB3_HULL_D = 62.0, 24.0, 40.0
+MB3_TURRET_W, MB3_TURRET_H, MB3_TURRET_D = 22.0, 10.0, 22.0
+MB3_BARREL_L, MB3_BARREL_H, MB3_BARREL_D = 36.0, 5.0, 5.0
+MB3_TURRET_Z = 14.0
+MB3_TREAD_Z  = -12.0
+MB3_SPEED = 0.55
+MB3_BULLET_SPEED = 14.0
+MB3_BULLET_TTL = 5200
+MB3_FIRE_CD_MS = 3000
+MB3_SPREAD_DEG = 12.0
+MB3_CLONE_HP = 3
+MB3_TOTAL_HP = 6
+
+# ---------- Final boss (Level 4) ----------
+FB_HULL_W, FB_HULL_H, FB_HULL_D = 110.0, 36.0, 80.0
+FB_TURRET_W, FB_TURRET_H, FB_TURRET_D = 42.0, 16.0, 42.0
+FB_BARREL_L, FB_BARREL_H, FB_BARREL_D = 56.0, 7.0, 7.0
+FB_TURRET_Z = 22.0
+FB_TREAD_Z  = -18.0
+FB_HP = 20
+FB_SPEED = 0.48
+FB_STANDOFF_R = 220.0
+FB_STANDOFF_DB = 12.0
+FB_BULLET_SPEED = 18.0
+FB_BULLET_TTL = 6500
+FB_VOLLEY_SPREADS = (-18.0, -6.0, 6.0, 18.0)
+FB_PAUSE_MS = 1000
+FB_LASER_MS = 1000
+FB_BURST_MS = 2500
+FB_LASER_LEN = 1400.0
+FB_LASER_HIT_RADIUS = 14.0
+FB_PHASE_BURST = 0
+FB_PHASE_PAUSE = 1
+FB_PHASE_LASER = 2
+
+# ---------- Projectile hit radii vs the player tank (10 + bullet), by owner ----------
+HOSTILE_HIT_R = np.zeros(N_OWNERS)
+HOSTILE_HIT_R[OWNER_ENEMY] = 10.0 + 4.0
+HOSTILE_HIT_R[OWNER_MB1] = 10.0 + 4.5
+HOSTILE_HIT_R[OWNER_MB2] = 10.0 + 5.0
+HOSTILE_HIT_R[OWNER_MB3] = 10.0 + 5.0
+HOSTILE_HIT_R[OWNER_FB] = 10.0 + 6.0
+HOSTILE_HIT_MAX = float(HOSTILE_HIT_R.max())
+
+# ---------- Collision broadphase ----------
+COLLISION_CELL = 64.0          # >= largest hit radius (final boss, ~56)
+COLLISION_CROSSCHECK = False   # debug: verify every grid query against brute force
+BROADPHASE_MIN_ITEMS = 48      # below this many bullets / tanks a flat scan is cheaper than the grid
+
+# ---------- AI level of detail ----------
+# With many enemies, those farther than AI_NEAR_R re-steer only every
+# AI_FAR_PERIOD ticks (staggered by row) and coast on their last velocity in
+# between. Firing enemies re-aim first; bosses and clones always run full rate.
+AI_LOD_MIN_ENEMIES = 48        # below this many live enemies everyone updates every tick
+AI_NEAR_R = 300.0
+AI_FAR_PERIOD = 4
+
+# ---------- Levels ----------
+DEFAULT_LEVELS = load_levels()   # levels.json, compiled once
+
+# ---------- Stress mode ----------
+# One endless level of N enemies in rings, every one of them firing; the
+# `[` / `]` keys walk N along STRESS_STEPS to find where frame / tick time breaks.
+STRESS_STEPS = (10, 30, 100, 300, 1000, 3000, 10000)
+STRESS_DEFAULT_N = 100
+
+# ---------- Input events ----------
+# Front ends and policies queue input on the World; it is applied at the start
+# of the next tick, so a recording of (tick, event) pairs replays exactly.
+IN_KEY_DOWN = 0     # arg: key code (ord)
+IN_KEY_UP = 1
+IN_FIRE = 2
+IN_CAMERA = 3       # arg: CAM_*; the sim ignores these, `on_camera` gets them
+CAM_LEFT, CAM_RIGHT, CAM_UP, CAM_DOWN, CAM_TOGGLE = range(5)
+
+# ---------- Utilities ----------
+def clamp(x, lo, hi):
+    return max(lo, min(hi, x))
+
+def rad(deg):
+    return deg * math.pi / 180.0
+
+def deg(angle_rad):
+    return angle_rad * 180.0 / math.pi
+
+def ang_norm(a):
+    """Normalize to [-180,180)."""
+    a = (a + 180.0) % 360.0 - 180.0
+    return a
+
+def dist2(ax, ay, bx, by):
+    dx, dy = bx-ax, by-ay
+    return dx*dx + dy*dy
+
+def point_segment_dist2(px, py, ax, ay, bx, by):
+    """Squared distance from point P to segment AB."""
+    vx, vy = bx - ax, by - ay
+    wx, wy = px - ax, py - ay
+    vv = vx*vx + vy*vy
+    if vv <= 1e-8:
+        return dist2(px, py, ax, ay)
+    t = (wx*vx + wy*vy) / vv
+    t = max(0.0, min(1.0, t))
+    cx, cy = ax + t*vx, ay + t*vy
+    return dist2(px, py, cx, cy)
+
+# ---------- Clocks ----------
+class ManualClock:
+    """Millisecond clock advanced by hand (headless runs, tests)."""
+    def __init__(self, start_ms=0):
+        self.now_ms = start_ms
+
+    def advance(self, dt_ms):
+        self.now_ms += dt_ms
+
+    def __call__(self):
+        return self.now_ms
+
+# ===================== WORLD =====================
+class World:
+    """One match: player tank, enemies, bosses, bullets and level progression.
+
+    `clock` is any zero-arg callable returning milliseconds. `advance()` reads
+    it, banks the elapsed time and runs as many fixed `tick_ms` steps as fit
+    (at most MAX_CATCHUP_TICKS); the leftover fraction is `render_alpha()`.
+    `step(dt_ms)` runs one simulation tick directly.
+
+    All randomness comes from `rng`, seeded per match (a seed is drawn when
+    none is given and kept in `seed`), and all input goes through the queue
+    below, so a seed plus the input log reproduces a match exactly.
+    """
+
+    def __init__(self, seed=None, clock=None, tick_hz=TICK_HZ, levels=None):
+        self.campaign_levels = levels if levels is not None else DEFAULT_LEVELS
+        self.levels = self.campaign_levels
+        self.stress_n = 0                # enemies in stress mode; 0 = normal play
+        self.clock = clock if clock is not None else ManualClock()
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng = random.Random(self.seed)
+        self.tick_ms = 1000.0 / tick_hz
+        self.max_catchup_ticks = MAX_CATCHUP_TICKS
+        self.tick_count = 0
+        self.time_ms = 0
+        self.last_time_ms = None
+        self._acc_ms = 0.0
+        # ---------- Mode/Cheat ----------
+        self.level_index = 1
+        self.mode_name = self.levels[0].name
+        self.cheat_invincible = False
+        self.cheat_no_cooldown = False
+        # ---------- Input ----------
+        self.keys_down = set()
+        self._inputs = []        # (IN_*, arg) queued since the last tick (part of the snapshot)
+        self.on_camera = None    # front end: called with CAM_* as camera events are applied
+        self.recorder = None     # replay.Recorder, if this match is being recorded
+        self.input_source = None # replay.Replay.feed when playing a recording back
+        # ---------- Instrumentation ----------
+        self.perf = None         # perf.FrameTimers while stage timing is on
+        self._lap = no_lap
+        # ---------- Fire control ----------
+        self.last_fire_time_ms = -99999
+        self._en_fire_t_acc = 0
+        # ---------- Player / tank state ----------
+        self.tank_pos = [0.0, 0.0, 20.0]  # x, y, z (z = hull half-height)
+        self.projectiles = ProjectileStore()  # player + every enemy bullet, tagged by owner
+        self._grid = SpatialHash(COLLISION_CELL, GRID_LENGTH)
+        self._grid_version = -1
+        self.collision_crosscheck = COLLISION_CROSSCHECK
+        # ---------- Enemies / bosses ----------
+        self.enemies_basic = EnemyStore()
+        self.beams = BeamStore(GRID_LENGTH)  # lasers, every owner
+        self._sep_grid = SpatialHash(MIN_SEP, GRID_LENGTH)
+        self.ai_updated = 0      # enemies whose AI ran last tick (diagnostics)
+        self.hard_reset()
+
+    # ---------- HARD RESET ----------
+    def hard_reset(self):
+        self.tank_pos[:] = [0.0, 0.0, 20.0]
+        self.tank_yaw = 0.0              # hull heading in degrees (0 -> +X)
+        self.barrel_rel = 0.0            # turret rotation RELATIVE to hull (degrees)
+        self._turned()
+        self._snap_tank()
+        self.tank_velocity = 0.0
+        self.strafe_velocity = 0.0
+        self.projectiles.clear()
+        self.enemies_basic.clear()
+        self.basic_kills = 0
+        self.wave_index = 0
+        self.boss_spawned = False        # this level's boss has appeared
+        self.miniboss1 = None
+        self.miniboss2 = None
+        self.miniboss3 = None
+        self.final_boss = None
+        self.fb_laser_active = False
+        self.beams.clear()
+        self.player_hits_taken = 0       # enemy bullets that hit player
+        self.game_over_freeze = False    # freeze updates on player death
+        self.game_win_freeze = False     # freeze on final victory
+        self.killed_by_laser = False     # special banner for laser kill
+        self.player_blocked = False      # true when surrounded (movement locked)
+        self.level1_complete_banner_ms = 0
+        self.level2_complete_banner_ms = 0
+        self.final_boss_banner_ms = 0
+        self.set_level(1)
+        self.start_level_waves()
+
+    # ---------- Input queue ----------
+    def push_input(self, code, arg=0):
+        """Queue one IN_* event (arg 0..255) for the next tick."""
+        self._inputs.append((code, arg))
+
+    def key_down(self, k):
+        if len(k) == 1 and ord(k) < 256:
+            self.push_input(IN_KEY_DOWN, ord(k))
+
+    def key_up(self, k):
+        if len(k) == 1 and ord(k) < 256:
+            self.push_input(IN_KEY_UP, ord(k))
+
+    def fire(self):
+        self.push_input(IN_FIRE)
+
+    def camera(self, cam):
+        self.push_input(IN_CAMERA, cam)
+
+    def take_inputs(self):
+        """Remove and return the queued events (for a front end that forwards them elsewhere)."""
+        events, self._inputs = self._inputs, []
+        return events
+
+    def clear_inputs(self):
+        """Drop the queued events (a replay seek, which restores a keyframe instead)."""
+        self._inputs = []
+
+    def has_pending_input(self):
+        """True while events are queued for the next tick."""
+        return bool(self._inputs)
+
+    def hold_keys(self, keys):
+        """Queue the key ups / downs that make `keys` exactly the held set (policies)."""
+        for k in sorted(self.keys_down.difference(keys)):
+            self.key_up(k)
+        for k in sorted(set(keys).difference(self.keys_down)):
+            self.key_down(k)
+
+    def _apply_inputs(self):
+        events = self._inputs
+        if not events:
+            return
+        self._inputs = []
+        if self.recorder is not None:
+            self.recorder.record(self.tick_count, events)
+        for code, arg in events:
+            if code == IN_KEY_DOWN:
+                self._press(chr(arg))
+            elif code == IN_KEY_UP:
+                self.keys_down.discard(chr(arg))
+            elif code == IN_FIRE:
+                self.attempt_fire()
+            elif code == IN_CAMERA and self.on_camera is not None:
+                self.on_camera(arg)
+
+    def _press(self, k):
+        self.keys_down.add(k)
+        if k == 'c':
+            self.toggle_cheat()
+        elif k == 'r':
+            self.hard_reset()
+        elif k in ('1', '2', '3', '4'):
+            self.set_level(int(k))
+        elif k == 'x':
+            self.set_stress(0 if self.stress_n else STRESS_DEFAULT_N)
+        elif k in ('[', ']') and self.stress_n:
+            i = min(range(len(STRESS_STEPS)), key=lambda j: abs(STRESS_STEPS[j] - self.stress_n))
+            i = clamp(i + (1 if k == ']' else -1), 0, len(STRESS_STEPS) - 1)
+            self.set_stress(STRESS_STEPS[i])
+
+    # ---------- Input / actions ----------
+    def toggle_cheat(self):
+        self.cheat_invincible = not self.cheat_invincible
+        self.cheat_no_cooldown = self.cheat_invincible
+        if self.cheat_invincible and (self.game_over_freeze or self.game_win_freeze):
+            self.game_over_freeze = False
+            self.game_win_freeze = False
+            self.player_hits_taken = 0
+
+    def set_perf(self, timers):
+        """Time each update stage into `timers` (a perf.FrameTimers), or stop with None."""
+        self.perf = timers
+        self._lap = timers.lap if timers is not None else no_lap
+
+    def set_stress(self, n):
+        """Restart in stress mode with `n` enemies (player invincible), or back to the campaign with 0."""
+        self.stress_n = n
+        self.levels = (stress_level(n),) if n else self.campaign_levels
+        if n and not self.cheat_invincible:
+            self.toggle_cheat()
+        self.hard_reset()
+
+    def set_level(self, idx):
+        idx = clamp(idx, 1, len(self.levels))
+        if idx != self.level_index:
+            self.boss_spawned = False
+        self.level_index = idx
+        self.mode_name = self.level.name
+
+    @property
+    def level(self):
+        """The compiled Level being played."""
+        return self.levels[self.level_index - 1]
+
+    def attempt_fire(self):
+        if self.game_over_freeze or self.game_win_freeze:
+            return
+        now = self.time_ms
+
+        cd = 0 if self.cheat_no_cooldown else self.level.player_fire_cd_ms
+
+        if now - self.last_fire_time_ms < cd:
+            return
+        self.last_fire_time_ms = now
+        self.spawn_projectile()
+
+    def spawn_projectile(self):
+        tank_pos = self.tank_pos
+        px = tank_pos[0] + self.tank_hx * 12.0
+        py = tank_pos[1] + self.tank_hy * 12.0
+        pz = tank_pos[2] + 20.0
+        speed = 12.0
+        base_angle = self.tank_yaw + self.barrel_rel
+        level = self.level
+        bullet_size = level.player_bullet_size
+        for angle_offset in level.player_spread_deg:
+            vx, vy = heading(base_angle + angle_offset)
+            vx *= speed
+            vy *= speed
+            self.projectiles.spawn(px + vx * 0.08, py + vy * 0.08, pz, vx, vy, 3500, bullet_size, OWNER_PLAYER)
+
+    # ---------- Player ----------
+    def update_player(self, dt_ms):
+        # tuning values below are per 16 ms frame; f rescales them to the tick length
+        f = dt_ms / 16.0
+        keys_down = self.keys_down
+        tank_pos = self.tank_pos
+        forward = 0.0
+        turn_dir = 0.0
+        strafe = 0.0
+        if 'j' in keys_down or 'l' in keys_down:
+            if 'j' in keys_down:
+                self.barrel_rel = (self.barrel_rel - 1.4 * f) % 360.0
+            if 'l' in keys_down:
+                self.barrel_rel = (self.barrel_rel + 1.4 * f) % 360.0
+            self._barrel_turned()
+        if self.game_over_freeze or self.game_win_freeze:
+            return
+        if 'w' in keys_down: forward += 0.3
+        if 's' in keys_down: forward -= 0.3
+        if 'd' in keys_down: turn_dir -= 0.3
+        if 'a' in keys_down: turn_dir += 0.3
+        if 'e' in keys_down: strafe -= 0.5
+        if 'q' in keys_down: strafe += 0.5
+        tank_velocity = self.tank_velocity
+        strafe_velocity = self.strafe_velocity
+        damp = (1.0 - friction) ** f
+        if self.player_blocked:
+            forward = 0.0
+            strafe = 0.0
+            tank_velocity *= damp
+            strafe_velocity *= damp
+        target_speed = max_speed * forward
+        if abs(target_speed) > abs(tank_velocity):
+            tank_velocity += accel * f * math.copysign(1.0, target_speed - tank_velocity)
+        else:
+            if tank_velocity > target_speed:
+                tank_velocity = max(target_speed, tank_velocity - decel * f)
+            else:
+                tank_velocity = min(target_speed, tank_velocity + decel * f)
+        if forward == 0.0:
+            tank_velocity *= damp
+        target_strafe = strafe * strafe_speed
+        if abs(target_strafe) > abs(strafe_velocity):
+            strafe_velocity += 0.18 * f * math.copysign(1.0, target_strafe - strafe_velocity)
+        else:
+            if strafe_velocity > target_strafe:
+                strafe_velocity = max(target_strafe, strafe_velocity - 0.22 * f)
+            else:
+                strafe_velocity = min(target_strafe, strafe_velocity + 0.22 * f)
+        if strafe == 0.0:
+            strafe_velocity *= damp
+        self.tank_velocity = tank_velocity
+        self.strafe_velocity = strafe_velocity
+        # strafing is along the hull's left, the heading turned +90 degrees
+        tank_pos[0] += (self.tank_hx * tank_velocity + self.strafe_hx * strafe_velocity) * f
+        tank_pos[1] += (self.tank_hy * tank_velocity + self.strafe_hy * strafe_velocity) * f
+        if turn_dir:
+            self.tank_yaw = (self.tank_yaw + turn_dir * turn_speed * f) % 360.0
+            self._hull_turned()
+        border = GRID_LENGTH - 50
+        tank_pos[0] = clamp(tank_pos[0], -border, border)
+        tank_pos[1] = clamp(tank_pos[1], -border, border)
+
+    def update_projectiles(self, dt_ms):
+        """Move / age every projectile, then resolve enemy bullets vs the player.
+
+        Hits are swept: a bullet hits if its segment this tick (x0 -> x) passes
+        within the hit radius of the player. Expired / out-of-arena bullets are
+        culled at the end of the tick (`step`), after every hit test.
+        """
+        self.projectiles.integrate(dt_ms)
+        self._lap("projectiles")
+        if not self.cheat_invincible:
+            self._hostile_bullets_vs_player()
+
+    def _hostile_bullets_vs_player(self):
+        store = self.projectiles
+        if store.n == 0:
+            return
+        px, py = self.tank_pos[0], self.tank_pos[1]
+        if store.n >= BROADPHASE_MIN_ITEMS or self.collision_crosscheck:
+            # grid holds segment end points; the start can be up to max_step further away
+            _, cand = self._bullet_grid().query_pairs(px, py, HOSTILE_HIT_MAX + store.max_step)
+        else:
+            cand = np.arange(store.n)
+        owner = store.owner[cand]
+        r = HOSTILE_HIT_R[owner]
+        d2 = point_segment_dist2_np(px, py, store.x0[cand], store.y0[cand], store.x[cand], store.y[cand])
+        hits = cand[(owner != OWNER_PLAYER) & (d2 <= r * r)]
+        if self.collision_crosscheck:
+            owner = store.owner
+            r = HOSTILE_HIT_R[owner]
+            d2 = point_segment_dist2_np(px, py, store.x0, store.y0, store.x, store.y)
+            brute = np.flatnonzero((owner != OWNER_PLAYER) & (d2 <= r * r))
+            _crosscheck("hostile bullets vs player", np.sort(hits), brute)
+        if len(hits):
+            self._player_hit(len(hits))
+            store.remove(hits)
+
+    def _player_hit(self, n=1):
+        self.player_hits_taken += n
+        if self.player_hits_taken >= PLAYER_MAX_HITS:
+            self.game_over_freeze = True
+
+    # ---------- Collision broadphase ----------
+    def _bullet_grid(self):
+        """Spatial hash over all live projectiles, rebuilt only when the store changed."""
+        store = self.projectiles
+        if self._grid_version != store.version:
+            self._grid.build(store.x, store.y)
+            self._grid_version = store.version
+        return self._grid
+
+    def _player_bullet_pairs(self, tx, ty, hit_r):
+        """(bullet, target) index pairs with a player bullet's swept segment within hit_r of a target.
+
+        Sorted by bullet (fire order), then target (list order).
+        """
+        store = self.projectiles
+        if store.n >= BROADPHASE_MIN_ITEMS or self.collision_crosscheck:
+            qi, bi = self._bullet_grid().query_pairs(tx, ty, hit_r + store.max_step)
+        else:
+            qi = np.repeat(np.arange(len(tx)), store.n)
+            bi = np.tile(np.arange(store.n), len(tx))
+        d2 = point_segment_dist2_np(tx[qi], ty[qi], store.x0[bi], store.y0[bi], store.x[bi], store.y[bi])
+        ok = (store.owner[bi] == OWNER_PLAYER) & (d2 <= hit_r * hit_r)
+        qi, bi = qi[ok], bi[ok]
+        order = np.lexsort((qi, bi))
+        bi, qi = bi[order], qi[order]
+        if self.collision_crosscheck:
+            p_idx = store.owned(OWNER_PLAYER)
+            d2 = point_segment_dist2_np(tx[None, :], ty[None, :], store.x0[p_idx][:, None], store.y0[p_idx][:, None],
+                                        store.x[p_idx][:, None], store.y[p_idx][:, None])
+            pi, ti = np.nonzero(d2 <= hit_r * hit_r)
+            _crosscheck("player bullets vs targets", np.stack([bi, qi]), np.stack([p_idx[pi], ti]))
+        return bi, qi
+
+    def _player_bullets_vs_tanks(self, tx, ty, hit_r, on_hit):
+        """Each player bullet hits the first target (tx/ty order) within hit_r that takes it.
+
+        Bullets are resolved in fire order. `on_hit(j)` applies the hit to target
+        j and returns False if j was already dead (killed by an earlier bullet
+        this pass), in which case the bullet tries the next target. Bullets that
+        land are removed.
+        """
+        if len(tx) == 0 or self.projectiles.count(OWNER_PLAYER) == 0:
+            return
+        bi, qi = self._player_bullet_pairs(tx, ty, hit_r)
+        rm = []
+        for b, q in zip(bi.tolist(), qi.tolist()):
+            if rm and rm[-1] == b:
+                continue
+            if on_hit(q):
+                rm.append(b)
+        self.projectiles.remove(rm)
+
+    def _player_bullets_vs_boss(self, boss, hit_r, damage):
+        """Player bullets (fire order) chip `damage` off the boss until it dies. True on kill."""
+        if boss is None:
+            return False
+        store = self.projectiles
+        if store.count(OWNER_PLAYER) == 0:
+            return False
+        bi, _ = self._player_bullet_pairs(np.array([boss.x]), np.array([boss.y]), hit_r)
+        rm = []
+        died = False
+        for i in bi:
+            boss.hp -= damage
+            rm.append(i)
+            if boss.hp <= 0:
+                died = True
+                break
+        store.remove(rm)
+        return died
+
+    # ===================== BASIC ENEMIES (Level 1,2,3) =====================
+    def start_level_waves(self):
+        """Fresh enemy set for the current level: clear the field and spawn its first wave."""
+        self.enemies_basic.clear()
+        self.projectiles.clear(OWNER_ENEMY)
+        self.basic_kills = 0
+        self.wave_index = 0
+        if self.level.n_waves:
+            self.enemies_basic.spawn_many(*self.level.wave(0))
+
+    def _next_wave(self):
+        """Spawn the level's next wave once the current one is wiped out."""
+        level = self.level
+        if self.wave_index + 1 < level.n_waves and self.enemies_basic.alive_count() == 0:
+            self.wave_index += 1
+            self.enemies_basic.spawn_many(*level.wave(self.wave_index))
+
+    def _separate_enemies(self, x, y):
+        """Push live enemies (gathered x, y arrays, updated in place) apart to MIN_SEP."""
+        if len(x) < 2:
+            return
+        grid = self._sep_grid if len(x) >= BROADPHASE_MIN_ITEMS else None
+        separate_points(x, y, MIN_SEP, self.rng, grid)
+
+    def _check_player_surrounded(self):
+        if self.game_over_freeze or self.game_win_freeze:
+            self.player_blocked = False
+            return
+        store = self.enemies_basic
+        live = store.live()
+        dx = store.x[live] - self.tank_pos[0]
+        dy = store.y[live] - self.tank_pos[1]
+        near = dx*dx + dy*dy <= CROWD_RADIUS * CROWD_RADIUS
+        if np.count_nonzero(near) < 4:
+            self.player_blocked = False
+            return
+        ang = np.degrees(np.arctan2(dy[near], dx[near]))
+        east = (ang >= -45.0) & (ang < 45.0)
+        north = (ang >= 45.0) & (ang < 135.0)
+        south = (ang > -135.0) & (ang < -45.0)
+        west = ~(east | north | south)
+        self.player_blocked = bool(east.any() and north.any() and south.any() and west.any())
+
+    def _ai_due(self, live):
+        """Bool mask over `live`: rows that run their AI this tick (near the player or in this tick's bucket)."""
+        store = self.enemies_basic
+        dx = store.x[live] - self.tank_pos[0]
+        dy = store.y[live] - self.tank_pos[1]
+        near = dx*dx + dy*dy < AI_NEAR_R * AI_NEAR_R
+        return near | (live % AI_FAR_PERIOD == self.tick_count % AI_FAR_PERIOD)
+
+    def update_enemies_basic(self, dt_ms):
+        store = self.enemies_basic
+        live = store.live()
+        level = self.level
+        volley = level.enemy_fire_all and self._en_fire_t_acc + dt_ms >= level.enemy_fire_cd_ms
+        due = None
+        if len(live) >= AI_LOD_MIN_ENEMIES and not volley:
+            due = self._ai_due(live)
+            if due.all():
+                due = None
+        if due is None:
+            # gather once, steer + separate on the arrays, scatter once
+            x, y, hx, hy = store.x[live], store.y[live], store.hx[live], store.hy[live]
+            x0, y0 = x.copy(), y.copy()
+            steer(x, y, hx, hy, store.speed[live], self.tank_pos[0], self.tank_pos[1], dt_ms / 16.0,
+                  EN_STANDOFF_R, STANDOFF_DEADBAND, 0.45, GRID_LENGTH - 50)
+            store.vx[live] = (x - x0) / dt_ms
+            store.vy[live] = (y - y0) / dt_ms
+            self._separate_enemies(x, y)
+            store.x[live] = x
+            store.y[live] = y
+            store.hx[live] = hx
+            store.hy[live] = hy
+            self.ai_updated = len(live)
+        else:
+            self._update_enemies_lod(live, due, dt_ms)
+        self._en_fire_t_acc += dt_ms
+        if self._en_fire_t_acc >= level.enemy_fire_cd_ms and (level.enemy_fire_all or self.projectiles.count(OWNER_ENEMY) == 0):
+            self._en_fire_t_acc = 0
+            if len(live) and level.enemy_fire_all:
+                self._enemy_volley(live)
+            elif len(live):
+                i = self.rng.choice(live.tolist())
+                if due is not None:
+                    # the shooter may be coasting: aim it before it fires
+                    store.hx[i], store.hy[i] = toward(self.tank_pos[0] - store.x[i], self.tank_pos[1] - store.y[i])
+                hx, hy = float(store.hx[i]), float(store.hy[i])
+                muzzle_forward = EN_BARREL_L + 10.0
+                bx = store.x[i] + hx * muzzle_forward
+                by = store.y[i] + hy * muzzle_forward
+                bz = store.z[i] + EN_TURRET_Z
+                yaw_r = math.atan2(hy, hx)
+                self.projectiles.spawn(bx, by, bz, hx * EN_BULLET_SPEED, math.sin(rad(yaw_r)) * EN_BULLET_SPEED, EN_BULLET_TTL, 4.5, OWNER_ENEMY)
+        if len(live):
+            def kill(j):
+                if not store.kill(live[j]):
+                    return False
+                self.basic_kills += 1
+                return True
+            self._lap("enemies")
+            self._player_bullets_vs_tanks(store.x[live], store.y[live], EN_HULL_W*0.35 + 4.0, kill)
+            self._lap("collision")
+        self._check_player_surrounded()
+
+    def _update_enemies_lod(self, live, due, dt_ms):
+        """AI for the `due` rows only; the rest coast on their last velocity. Separation
+        resolves every overlap that involves a due row."""
+        store = self.enemies_basic
+        rows = live[due]
+        coast = live[~due]
+        bound = GRID_LENGTH - 50
+        cx = store.x[coast] + store.vx[coast] * dt_ms
+        cy = store.y[coast] + store.vy[coast] * dt_ms
+        store.x[coast] = np.minimum(np.maximum(cx, -bound), bound)
+        store.y[coast] = np.minimum(np.maximum(cy, -bound), bound)
+        x, y, hx, hy = store.x[rows], store.y[rows], store.hx[rows], store.hy[rows]
+        x0, y0 = x.copy(), y.copy()
+        steer(x, y, hx, hy, store.speed[rows], self.tank_pos[0], self.tank_pos[1], dt_ms / 16.0,
+              EN_STANDOFF_R, STANDOFF_DEADBAND, 0.45, bound)
+        store.vx[rows] = (x - x0) / dt_ms
+        store.vy[rows] = (y - y0) / dt_ms
+        store.x[rows] = x
+        store.y[rows] = y
+        store.hx[rows] = hx
+        store.hy[rows] = hy
+        ax, ay = store.x[live], store.y[live]
+        separate_points(ax, ay, MIN_SEP, self.rng, self._sep_grid, active=due)
+        store.x[live] = ax
+        store.y[live] = ay
+        self.ai_updated = len(rows)
+
+    def _enemy_volley(self, rows):
+        """Every enemy in `rows` fires one bullet along its heading (stress mode)."""
+        store = self.enemies_basic
+        c, s = store.hx[rows], store.hy[rows]
+        muzzle_forward = EN_BARREL_L + 10.0
+        self.projectiles.spawn_many(store.x[rows] + c * muzzle_forward, store.y[rows] + s * muzzle_forward,
+                                    store.z[rows] + EN_TURRET_Z, c * EN_BULLET_SPEED, s * EN_BULLET_SPEED,
+                                    EN_BULLET_TTL, 4.5, OWNER_ENEMY)
+
+    def _chase(self, tanks, speed, dt_ms, bound):
+        """Run boss / clone tanks through the batched steering kernel: face and close on the player."""
+        x = np.array([t.x for t in tanks])
+        y = np.array([t.y for t in tanks])
+        hx = np.empty(len(tanks))
+        hy = np.empty(len(tanks))
+        steer(x, y, hx, hy, speed, self.tank_pos[0], self.tank_pos[1], dt_ms / 16.0, bound=bound)
+        for t, tx_, ty_, thx, thy in zip(tanks, x.tolist(), y.tolist(), hx.tolist(), hy.tolist()):
+            t.x = tx_
+            t.y = ty_
+            t.hx = thx
+            t.hy = thy
+
+    # ---------- MiniBoss1 (10 HP) ----------
+    def _spawn_miniboss1(self):
+        tank_pos = self.tank_pos
+        for _ in range(20):
+            r = self.rng.choice([300.0, 360.0, 420.0])
+            ang = self.rng.random() * 2.0 * math.pi
+            ex = tank_pos[0] + math.cos(ang) * r
+            ey = tank_pos[1] + math.sin(ang) * r
+            br = GRID_LENGTH - 80
+            if -br <= ex <= br and -br <= ey <= br:
+                break
+        hx, hy = toward(tank_pos[0] - ex, tank_pos[1] - ey)
+        self.miniboss1 = MiniBoss1(ex, ey, 22.0, hx, hy, MB1_HP_SEGMENTS, MB1_FIRE_CD_MS_BASE, MB1_BULLET_SPEED_BASE, MB1_SPEED_BASE, MB1_TURN_BASE)
+
+    def _update_miniboss1(self, dt_ms):
+        miniboss1 = self.miniboss1
+        if miniboss1 is None:
+            return
+        self._chase([miniboss1], miniboss1.speed, dt_ms, GRID_LENGTH - 60)
+        max_step = miniboss1.turn_speed * (dt_ms / 1000.0)
+        cur = miniboss1.turret_rel
+        delta = clamp(0.0 - cur, -max_step, max_step)
+        miniboss1.turret_rel = (cur + delta)
+        miniboss1.fire_t += dt_ms
+        if miniboss1.fire_t >= miniboss1.fire_cd:
+            miniboss1.fire_t = 0
+            ax, ay = miniboss1.hx, miniboss1.hy
+            if miniboss1.turret_rel:
+                ax, ay = rotate(ax, ay, *heading(miniboss1.turret_rel))
+            mx = miniboss1.x + ax * (MB1_BARREL_L + 12.0)
+            my = miniboss1.y + ay * (MB1_BARREL_L + 12.0)
+            mz = miniboss1.z + MB1_TURRET_Z
+            self.projectiles.spawn(mx, my, mz, ax*miniboss1.bullet_speed, ay*miniboss1.bullet_speed, MB1_BULLET_TTL, 5.0, OWNER_MB1)
+
+    def _player_bullets_vs_mb1(self):
+        return self._player_bullets_vs_boss(self.miniboss1, MB1_HULL_W*0.40 + 4.0, 1)
+    # ---------- Banners ----------
+    def _tick_banners(self, dt_ms):
+        if self.level1_complete_banner_ms > 0:
+            self.level1_complete_banner_ms = max(0, self.level1_complete_banner_ms - dt_ms)
+        if self.level2_complete_banner_ms > 0:
+            self.level2_complete_banner_ms = max(0, self.level2_complete_banner_ms - dt_ms)
+        if self.final_boss_banner_ms > 0:
+            self.final_boss_banner_ms = max(0, self.final_boss_banner_ms - dt_ms)
+
+    # ===================== MiniBoss2 (Level 2) =====================
+    def _spawn_miniboss2(self):
+        tank_pos = self.tank_pos
+        self.miniboss2 = MiniBoss2(0.0, 0.0, 22.0, 1.0, 0.0, MB2_HP_SEGMENTS)
+        corners = [(-GRID_LENGTH+80, -GRID_LENGTH+80), (GRID_LENGTH-80, -GRID_LENGTH+80), (-GRID_LENGTH+80,  GRID_LENGTH-80), (GRID_LENGTH-80,  GRID_LENGTH-80)]
+        cx, cy = self.rng.choice(corners)
+        tank_pos[0], tank_pos[1] = cx, cy
+        dx, dy = 0.0 - tank_pos[0], 0.0 - tank_pos[1]
+        self.tank_yaw = deg(math.atan2(dy, dx)) % 360.0
+        self.barrel_rel = 0.0
+        self._turned()
+        self.player_blocked = False
+        self._snap_tank()
+
+    def _update_miniboss2(self, dt_ms):
+        miniboss2 = self.miniboss2
+        if miniboss2 is None:
+            return
+        tank_pos = self.tank_pos
+        desired_rel = rel_deg(miniboss2.hx, miniboss2.hy, tank_pos[0] - miniboss2.x, tank_pos[1] - miniboss2.y)
+        cur_rel = miniboss2.turret_rel
+        max_step = MB2_TURRET_TURN * (dt_ms / 1000.0)
+        step = clamp(ang_norm(desired_rel - cur_rel), -max_step, max_step)
+        miniboss2.turret_rel = cur_rel + step
+        miniboss2.fire_t += dt_ms
+        if miniboss2.fire_t >= MB2_FIRE_CD_MS:
+            miniboss2.fire_t = 0
+            ax, ay = rotate(miniboss2.hx, miniboss2.hy, *heading(miniboss2.turret_rel))
+            mx = miniboss2.x + ax * (MB2_BARREL_L + 14.0)
+            my = miniboss2.y + ay * (MB2_BARREL_L + 14.0)
+            mz = miniboss2.z + MB2_TURRET_Z
+            self.projectiles.spawn(mx, my, mz, ax * MB2_BULLET_SPEED, ay * MB2_BULLET_SPEED, MB2_BULLET_TTL, 6.0, OWNER_MB2)
+        if not self.cheat_invincible:
+            miniboss2.aura_t += dt_ms
+            if dist2(tank_pos[0], tank_pos[1], miniboss2.x, miniboss2.y) <= MB2_AURA_RADIUS * MB2_AURA_RADIUS:
+                if miniboss2.aura_t >= MB2_AURA_TICK_MS:
+                    miniboss2.aura_t = 0
+                    self._player_hit(MB2_AURA_DAMAGE)
+            else:
+                miniboss2.aura_t = 0
+
+    def _player_bullets_vs_mb2(self):
+        return self._player_bullets_vs_boss(self.miniboss2, MB2_HULL_W*0.40 + 5.0, 2)
+    # ===================== MiniBoss3 (Level 3, Twins) =====================
+    def _spawn_miniboss3(self):
+        tank_pos = self.tank_pos
+        clones = []
+        base_r = 320.0
+        base_ang = self.rng.random() * 2.0 * math.pi
+        pos1 = (tank_pos[0] + math.cos(base_ang) * base_r, tank_pos[1] + math.sin(base_ang) * base_r)
+        pos2 = (tank_pos[0] + math.cos(base_ang + math.pi) * base_r, tank_pos[1] + math.sin(base_ang + math.pi) * base_r)
+        for (ex, ey) in (pos1, pos2):
+            br = GRID_LENGTH - 80
+            ex = clamp(ex, -br, br)
+            ey = clamp(ey, -br, br)
+            hx, hy = toward(tank_pos[0] - ex, tank_pos[1] - ey)
+            clones.append(Clone(ex, ey, 22.0, hx, hy, MB3_CLONE_HP))
+        self.miniboss3 = MiniBoss3(clones)
+
+    def _update_miniboss3(self, dt_ms):
+        if self.miniboss3 is None:
+            return
+        clones = self.miniboss3.clones
+        live = [c for c in clones if c.alive]
+        if live:
+            self._chase(live, MB3_SPEED, dt_ms, GRID_LENGTH - 60)
+        if all(cl.alive for cl in clones):
+            c0, c1 = clones[0], clones[1]
+            dx = c1.x - c0.x
+            dy = c1.y - c0.y
+            d2 = dx*dx + dy*dy
+            if d2 < (EN_HULL_W*1.2)**2:
+                d = max(1e-3, math.sqrt(d2))
+                push = (EN_HULL_W*1.2 - d) * 0.5
+                nx, ny = dx/d, dy/d
+                c0.x -= nx * push
+                c0.y -= ny * push
+                c1.x += nx * push
+                c1.y += ny * push
+        for c in clones:
+            if not c.alive:
+                continue
+            c.fire_t += dt_ms
+            if c.fire_t >= MB3_FIRE_CD_MS:
+                c.fire_t = 0
+                hx, hy = c.hx, c.hy
+                for rx, ry in rotations((0.0, MB3_SPREAD_DEG, -MB3_SPREAD_DEG)):
+                    ax, ay = hx * rx - hy * ry, hx * ry + hy * rx
+                    mx = c.x + ax * (MB3_BARREL_L + 12.0)
+                    my = c.y + ay * (MB3_BARREL_L + 12.0)
+                    mz = c.z + MB3_TURRET_Z
+                    self.projectiles.spawn(mx, my, mz, ax * MB3_BULLET_SPEED, ay * MB3_BULLET_SPEED, MB3_BULLET_TTL, 5.5, OWNER_MB3)
+
+    def _player_bullets_vs_mb3(self):
+        if self.miniboss3 is None:
+            return False
+        clones = self.miniboss3.clones
+        live = [c for c in clones if c.alive]
+
+        def damage(j):
+            c = live[j]
+            if not c.alive:
+                return False
+            c.hp -= 1
+            if c.hp <= 0:
+                c.alive = False
+            return True
+        self._player_bullets_vs_tanks(np.array([c.x for c in live]), np.array([c.y for c in live]),
+                                      MB3_HULL_W*0.40 + 5.0, damage)
+        return all(not c.alive for c in clones)
+    # ===================== FINAL BOSS (Level 4) =====================
+    def _spawn_final_boss(self):
+        tank_pos = self.tank_pos
+        r = GRID_LENGTH - 180.0
+        a = self.rng.random() * 2.0 * math.pi
+        ex = clamp(math.cos(a) * r, -GRID_LENGTH+80, GRID_LENGTH-80)
+        ey = clamp(math.sin(a) * r, -GRID_LENGTH+80, GRID_LENGTH-80)
+        hx, hy = toward(tank_pos[0] - ex, tank_pos[1] - ey)
+        self.final_boss = FinalBoss(ex, ey, 26.0, hx, hy, FB_HP, FB_PHASE_BURST)
+
+    def _fb_move_toward_standoff(self, dt_ms):
+        final_boss = self.final_boss
+        tank_pos = self.tank_pos
+        dtx = tank_pos[0] - final_boss.x
+        dty = tank_pos[1] - final_boss.y
+        d = math.hypot(dtx, dty)
+        hx, hy = final_boss.hx, final_boss.hy = (dtx / d, dty / d) if d > 0.0 else (1.0, 0.0)
+        step = FB_SPEED * (dt_ms / 16.0)
+        if d > FB_STANDOFF_R + FB_STANDOFF_DB:
+            final_boss.x += hx * step
+            final_boss.y += hy * step
+        elif d < FB_STANDOFF_R - FB_STANDOFF_DB:
+            back = step * 0.6
+            final_boss.x -= hx * back
+            final_boss.y -= hy * back
+        br = GRID_LENGTH - 70
+        final_boss.x = clamp(final_boss.x, -br, br)
+        final_boss.y = clamp(final_boss.y, -br, br)
+
+    def _fb_fire_volley(self):
+        final_boss = self.final_boss
+        hx, hy = final_boss.hx, final_boss.hy
+        for rx, ry in rotations(FB_VOLLEY_SPREADS):
+            ax, ay = hx * rx - hy * ry, hx * ry + hy * rx
+            mx = final_boss.x + ax * (FB_BARREL_L + 18.0)
+            my = final_boss.y + ay * (FB_BARREL_L + 18.0)
+            mz = final_boss.z + FB_TURRET_Z
+            self.projectiles.spawn(mx, my, mz, ax * FB_BULLET_SPEED, ay * FB_BULLET_SPEED, FB_BULLET_TTL, 6.2, OWNER_FB)
+
+    def _fb_begin_laser(self):
+        final_boss = self.final_boss
+        self.fb_laser_active = True
+        # beams sweep in degrees (beams.py)
+        self.beams.spawn(final_boss.x, final_boss.y, yaw_deg(final_boss.hx, final_boss.hy), 0.0, FB_LASER_HIT_RADIUS, OWNER_FB)
+
+    def _update_final_boss(self, dt_ms):
+        final_boss = self.final_boss
+        if final_boss is None:
+            return
+        phase = final_boss.phase
+        final_boss.phase_t += dt_ms
+        if phase == FB_PHASE_BURST:
+            if final_boss.phase_t <= dt_ms + 1:
+                self._fb_fire_volley()
+            self._fb_move_toward_standoff(dt_ms)
+            if final_boss.phase_t >= FB_BURST_MS:
+                final_boss.phase = FB_PHASE_PAUSE
+                final_boss.phase_t = 0
+        elif phase == FB_PHASE_PAUSE:
+            if final_boss.phase_t >= FB_PAUSE_MS:
+                final_boss.phase = FB_PHASE_LASER
+                final_boss.phase_t = 0
+                self._fb_begin_laser()
+        elif phase == FB_PHASE_LASER:
+            if final_boss.phase_t >= FB_LASER_MS:
+                final_boss.phase = FB_PHASE_BURST
+                final_boss.phase_t = 0
+                self.fb_laser_active = False
+                self.beams.clear(OWNER_FB)
+
+    def _player_bullets_vs_final_boss(self):
+        return self._player_bullets_vs_boss(self.final_boss, FB_HULL_W*0.45 + 6.0, 1)
+
+    # ---------- Beams ----------
+    def update_beams(self, dt_ms):
+        """Spin / re-clip every beam, then hostile beams vs the player (a beam hit is fatal)."""
+        beams = self.beams
+        beams.update(dt_ms)
+        if len(beams) == 0 or self.cheat_invincible or self.game_over_freeze:
+            return
+        hit = beams.hits([self.tank_pos[0]], [self.tank_pos[1]], mask=beams.owner != OWNER_PLAYER)
+        if hit.any():
+            self.killed_by_laser = True
+            self.player_hits_taken = PLAYER_MAX_HITS
+            self.game_over_freeze = True
+    # ---------- Simulation step ----------
+    @property
+    def frozen(self):
+        return self.game_over_freeze or self.game_win_freeze
+
+    def advance(self):
+        """Read the injected clock and run the fixed ticks that are due. Returns the tick count."""
+        now = self.clock()
+        if self.last_time_ms is None:
+            self.last_time_ms = now
+        self._acc_ms += now - self.last_time_ms
+        self.last_time_ms = now
+        n = 0
+        # small epsilon so a clock advanced by exactly tick_ms always yields one tick
+        while self._acc_ms >= self.tick_ms - 1e-9:
+            if n == self.max_catchup_ticks:
+                self._acc_ms %= self.tick_ms
+                break
+            self.step(self.tick_ms)
+            self._acc_ms -= self.tick_ms
+            n += 1
+        self._acc_ms = max(0.0, self._acc_ms)
+        return n
+
+    def resync_clock(self):
+        """Drop the time since the last advance: the next one starts counting from then (after a pause)."""
+        self.last_time_ms = None
+        self._acc_ms = 0.0
+
+    # ---------- Snapshot / restore ----------
+    def snapshot(self):
+        """The whole match state as a compact, versioned binary blob (see SNAPSHOT_VERSION).
+
+        Leaves out the clock, front-end hooks, recorder and caches. Equal
+        states give equal bytes, so blobs can be compared directly.
+        """
+        out = [_SNAP_HEAD.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+               _SNAP_SCALARS.pack(*[getattr(self, name) for name, _ in _SNAP_FIELDS], *self.tank_pos, *self._prev_tank)]
+        keys = sorted(ord(k) for k in self.keys_down)
+        out.append(struct.pack(f"<B{len(keys)}B", len(keys), *keys))
+        events = [b for ev in self._inputs for b in ev]
+        out.append(struct.pack(f"<H{len(events)}B", len(self._inputs), *events))
+        version, mt, gauss = self.rng.getstate()
+        out.append(_SNAP_RNG.pack(*mt, gauss is not None, gauss or 0.0))
+        out.append(self.projectiles.to_bytes())
+        out.append(self.enemies_basic.to_bytes())
+        out.append(self.beams.to_bytes())
+        for boss, schema in ((self.miniboss1, _MB1_SCHEMA), (self.miniboss2, _MB2_SCHEMA), (self.final_boss, _FB_SCHEMA)):
+            out.append(_pack_record(boss, schema))
+        clones = self.miniboss3.clones if self.miniboss3 is not None else None
+        out.append(struct.pack("<b", -1 if clones is None else len(clones)))
+        for c in clones or ():
+            out.append(_pack_record(c, _CLONE_SCHEMA))
+        return b"".join(out)
+
+    def restore(self, blob):
+        """Load a `snapshot`; the clock, hooks, recorder and pacing state are kept."""
+        magic, version = _SNAP_HEAD.unpack_from(blob)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"not a version {SNAPSHOT_VERSION} world snapshot")
+        pos = _SNAP_HEAD.size
+        vals = _SNAP_SCALARS.unpack_from(blob, pos)
+        pos += _SNAP_SCALARS.size
+        nf = len(_SNAP_FIELDS)
+        stress_n = self.stress_n
+        for (name, _), v in zip(_SNAP_FIELDS, vals):
+            setattr(self, name, v)
+        self.tank_pos[:] = vals[nf:nf + 3]
+        self._turned()
+        self._prev_tank = vals[nf + 3:nf + 9]
+        if self.stress_n != stress_n:
+            # rebuilding a big stress level costs more than the rest of a restore
+            self.levels = (stress_level(self.stress_n),) if self.stress_n else self.campaign_levels
+        self.mode_name = self.level.name
+        n = blob[pos]
+        self.keys_down = {chr(b) for b in blob[pos + 1:pos + 1 + n]}
+        pos += 1 + n
+        (n,) = struct.unpack_from("<H", blob, pos)
+        raw = blob[pos + 2:pos + 2 + 2 * n]
+        self._inputs = [(raw[i], raw[i + 1]) for i in range(0, 2 * n, 2)]
+        pos += 2 + 2 * n
+        rng = _SNAP_RNG.unpack_from(blob, pos)
+        self.rng.setstate((3, rng[:625], rng[626] if rng[625] else None))
+        pos += _SNAP_RNG.size
+        pos = self.projectiles.load_bytes(blob, pos)
+        pos = self.enemies_basic.load_bytes(blob, pos)
+        pos = self.beams.load_bytes(blob, pos)
+        self.miniboss1, pos = _unpack_record(blob, pos, _MB1_SCHEMA)
+        self.miniboss2, pos = _unpack_record(blob, pos, _MB2_SCHEMA)
+        self.final_boss, pos = _unpack_record(blob, pos, _FB_SCHEMA)
+        (n,) = struct.unpack_from("<b", blob, pos)
+        pos += 1
+        if n < 0:
+            self.miniboss3 = None
+        else:
+            clones = []
+            for _ in range(n):
+                c, pos = _unpack_record(blob, pos, _CLONE_SCHEMA)
+                clones.append(c)
+            self.miniboss3 = MiniBoss3(clones)
+        self._grid_version = -1
+
+    # ---------- Render interpolation ----------
+    def render_alpha(self):
+        """Fraction of a tick banked since the last step, for interpolating poses."""
+        return min(1.0, self._acc_ms / self.tick_ms)
+
+    def _turned(self):
+        """Recompute the cached hull and barrel headings after tank_yaw / barrel_rel changed."""
+        self._hull_turned()
+        self._barrel_turned()
+
+    def _hull_turned(self):
+        self.tank_hx, self.tank_hy = heading(self.tank_yaw)
+        self.strafe_hx, self.strafe_hy = heading(self.tank_yaw + 90.0)
+
+    def _barrel_turned(self):
+        self.barrel_hx, self.barrel_hy = heading(self.barrel_rel)
+
+    def _snap_tank(self):
+        self._prev_tank = (self.tank_pos[0], self.tank_pos[1], self.tank_hx, self.tank_hy, self.barrel_hx, self.barrel_hy)
+
+    def _save_prev_poses(self):
+        self._snap_tank()
+        self.enemies_basic.save_prev()
+        for e in self._boss_tanks():
+            e.px = e.x
+            e.py = e.y
+            e.phx = e.hx
+            e.phy = e.hy
+
+    def _boss_tanks(self):
+        """Every boss / clone tank (live or not)."""
+        for boss in (self.miniboss1, self.miniboss2, self.final_boss):
+            if boss is not None:
+                yield boss
+        if self.miniboss3 is not None:
+            yield from self.miniboss3.clones
+
+    def tank_pose(self, alpha):
+        """Player (x, y, hx, hy, bx, by) between the previous and current tick.
+
+        (hx, hy) is the hull's unit heading, (bx, by) the barrel's relative to the hull.
+        """
+        px, py, phx, phy, pbx, pby = self._prev_tank
+        return ((px + (self.tank_pos[0] - px) * alpha, py + (self.tank_pos[1] - py) * alpha)
+                + lerp(phx, phy, self.tank_hx, self.tank_hy, alpha)
+                + lerp(pbx, pby, self.barrel_hx, self.barrel_hy, alpha))
+
+    def pose(self, e, alpha):
+        """Boss / clone (x, y, hx, hy) between the previous and current tick; (hx, hy) a unit heading."""
+        px, py = e.px, e.py
+        return (px + (e.x - px) * alpha,
+                py + (e.y - py) * alpha) + lerp(e.phx, e.phy, e.hx, e.hy, alpha)
+
+    def bullet_xy(self, idx, alpha):
+        """Interpolated x, y arrays for projectile rows `idx` (along this tick's x0 -> x segment)."""
+        store = self.projectiles
+        x0, y0 = store.x0[idx], store.y0[idx]
+        return x0 + (store.x[idx] - x0) * alpha, y0 + (store.y[idx] - y0) * alpha
+
+    def step(self, dt):
+        self.time_ms += dt
+        self.tick_count += 1
+        if self.input_source is not None:
+            self.input_source(self)
+        self._apply_inputs()
+        self._save_prev_poses()
+        if self.frozen:
+            self.projectiles.integrate(0.0)   # bullets hold still (x0 = x for interpolation)
+        elif self.perf is not None:
+            self.perf.restart()
+            self._simulate(dt)
+            self.perf.tick_done()
+        else:
+            self._simulate(dt)
+        if self.recorder is not None:
+            self.recorder.tick_done(self)
+
+    def _maybe_spawn_boss(self):
+        """Bring in the level's boss once its kill count (and, if asked, a clear field) is reached."""
+        level = self.level
+        if level.boss is None or self.boss_spawned or self.basic_kills < level.boss_after_kills:
+            return
+        if level.boss_needs_clear and self.enemies_basic.alive_count():
+            return
+        if level.boss_clears_enemy_bullets:
+            self.projectiles.clear(OWNER_ENEMY)
+        self.boss_spawned = True
+        getattr(self, "_spawn_" + level.boss)()
+
+    def _boss_killed(self, owner):
+        """The level's boss is down: drop its bullets, show the banner, then win or move on."""
+        self.projectiles.clear(owner)
+        level = self.level
+        if level.banner is not None:
+            setattr(self, level.banner + "_banner_ms", level.banner_ms)
+        if level.win or self.level_index == len(self.levels):
+            self.game_win_freeze = True
+            return
+        self.set_level(self.level_index + 1)
+        self.start_level_waves()
+        self._maybe_spawn_boss()
+
+    def _simulate(self, dt):
+        lap = self._lap
+        self.update_player(dt)
+        lap("player")
+        self.update_projectiles(dt)
+        lap("collision")
+        self.update_enemies_basic(dt)
+        self._next_wave()
+        self._maybe_spawn_boss()
+        lap("enemies")
+        self._update_miniboss1(dt)
+        lap("miniboss1")
+        if self._player_bullets_vs_mb1():
+            self.miniboss1 = None
+            self._boss_killed(OWNER_MB1)
+        lap("collision")
+        self._update_miniboss2(dt)
+        lap("miniboss2")
+        if self._player_bullets_vs_mb2():
+            self.miniboss2 = None
+            self._boss_killed(OWNER_MB2)
+        lap("collision")
+        self._update_miniboss3(dt)
+        lap("miniboss3")
+        if self._player_bullets_vs_mb3():
+            self.miniboss3 = None
+            self._boss_killed(OWNER_MB3)
+        lap("collision")
+        self._update_final_boss(dt)
+        lap("final_boss")
+        if self._player_bullets_vs_final_boss():
+            self.final_boss = None
+            self.beams.clear(OWNER_FB)
+            self.fb_laser_active = False
+            self._boss_killed(OWNER_FB)
+        lap("collision")
+        self.update_beams(dt)
+        lap("beams")
+        self._tick_banners(dt)
+        lap("banners")
+        self.projectiles.cull(BULLET_WALL_LIMIT)
+        lap("projectiles")
+
+# ---------- Snapshot format ----------
+SNAPSHOT_MAGIC = b"BTWS"
+SNAPSHOT_VERSION = 5
+_SNAP_HEAD = struct.Struct("<4sH")
+# World scalars: (attribute, struct code); tank_pos (3d) and _prev_tank (6d) follow them
+_SNAP_FIELDS = (
+    ("seed", "q"), ("tick_ms", "d"), ("tick_count", "q"), ("time_ms", "d"),
+    ("level_index", "q"), ("stress_n", "q"), ("cheat_invincible", "?"), ("cheat_no_cooldown", "?"),
+    ("last_fire_time_ms", "d"), ("_en_fire_t_acc", "d"),
+    ("tank_yaw", "d"), ("barrel_rel", "d"), ("tank_velocity", "d"), ("strafe_velocity", "d"),
+    ("basic_kills", "q"), ("wave_index", "q"), ("boss_spawned", "?"), ("fb_laser_active", "?"),
+    ("player_hits_taken", "q"), ("game_over_freeze", "?"), ("game_win_freeze", "?"),
+    ("killed_by_laser", "?"), ("player_blocked", "?"),
+    ("level1_complete_banner_ms", "d"), ("level2_complete_banner_ms", "d"), ("final_boss_banner_ms", "d"),
+)
+_SNAP_SCALARS = struct.Struct("<" + "".join(code for _, code in _SNAP_FIELDS) + "3d6d")
+_SNAP_RNG = struct.Struct("<625I?d")   # Mersenne Twister state + cached gauss
+# bosses: class, field names and one struct (presence flag + fields)
+_POSE = (("px", "d"), ("py", "d"), ("phx", "d"), ("phy", "d"))
+_MB1_FIELDS = (("x", "d"), ("y", "d"), ("z", "d"), ("hx", "d"), ("hy", "d"), ("turret_rel", "d"), ("hp", "q"), ("fire_t", "d"),
+               ("fire_cd", "d"), ("bullet_speed", "d"), ("speed", "d"), ("turn_speed", "d")) + _POSE
+_MB2_FIELDS = (("x", "d"), ("y", "d"), ("z", "d"), ("hx", "d"), ("hy", "d"), ("turret_rel", "d"), ("hp", "q"), ("fire_t", "d"),
+               ("aura_t", "d")) + _POSE
+_FB_FIELDS = (("x", "d"), ("y", "d"), ("z", "d"), ("hx", "d"), ("hy", "d"), ("hp", "q"), ("phase", "q"), ("phase_t", "d")) + _POSE
+_CLONE_FIELDS = (("x", "d"), ("y", "d"), ("z", "d"), ("hx", "d"), ("hy", "d"), ("hp", "q"), ("fire_t", "d"), ("alive", "?")) + _POSE
+
+def _schema(cls, fields):
+    return cls, tuple(name for name, _ in fields), struct.Struct("<?" + "".join(code for _, code in fields))
+
+_MB1_SCHEMA = _schema(MiniBoss1, _MB1_FIELDS)
+_MB2_SCHEMA = _schema(MiniBoss2, _MB2_FIELDS)
+_FB_SCHEMA = _schema(FinalBoss, _FB_FIELDS)
+_CLONE_SCHEMA = _schema(Clone, _CLONE_FIELDS)
+
+def _pack_record(rec, schema):
+    _, names, st = schema
+    if rec is None:
+        return st.pack(False, *([0] * len(names)))
+    return st.pack(True, *[getattr(rec, n) for n in names])
+
+def _unpack_record(buf, pos, schema):
+    cls, names, st = schema
+    vals = st.unpack_from(buf, pos)
+    if not vals[0]:
+        return None, pos + st.size
+    rec = cls.__new__(cls)
+    for n, v in zip(names, vals[1:]):
+        setattr(rec, n, v)
+    return rec, pos + st.size
+
+def _crosscheck(what, fast, brute):
+    if not np.array_equal(fast, brute):
+        raise AssertionError(f"broadphase mismatch ({what}): grid={fast.tolist()} brute={brute.tolist()}")
+
+# ===================== PLAYER POLICIES (headless) =====================
+def _nearest_target(world):
+    """(x, y) of the closest live enemy, clone or boss, or None."""
+    tx, ty = world.tank_pos[0], world.tank_pos[1]
+    store = world.enemies_basic
+    live = store.live()
+    cands = list(zip(store.x[live].tolist(), store.y[live].tolist()))
+    for boss in (world.miniboss1, world.miniboss2, world.final_boss):
+        if boss is not None:
+            cands.append((boss.x, boss.y))
+    if world.miniboss3 is not None:
+        cands.extend((c.x, c.y) for c in world.miniboss3.clones if c.alive)
+    if not cands:
+        return None
+    return min(cands, key=lambda c: dist2(tx, ty, c[0], c[1]))
+
+def idle_policy(world):
+    """Player does nothing."""
+    world.hold_keys(())
+
+def aim_policy(world, fire=True):
+    """Keep the hull still, swing the turret onto the nearest target and fire (if `fire`)."""
+    target = _nearest_target(world)
+    if target is None:
+        world.hold_keys(())
+        return
+    want = deg(math.atan2(target[1] - world.tank_pos[1], target[0] - world.tank_pos[0]))
+    err = ang_norm(want - (world.tank_yaw + world.barrel_rel))
+    world.hold_keys('l' if err > 1.4 else ('j' if err < -1.4 else ''))
+    if fire and abs(err) < 6.0:
+        world.fire()
+
+_RANDOM_MOVES = ("", "w", "s", "wa", "wd", "sa", "sd", "a", "d", "q", "e")
+
+class RandomPolicy:
+    """Mash keys: a new random movement / turret combo about twice a second, random fire.
+
+    Has its own RNG, seeded from the match seed: the World's RNG must only be
+    drawn by the simulation, or replays (which feed recorded input, not the
+    policy) would drift.
+    """
+    def __init__(self, seed):
+        self.rng = random.Random(f"policy:{seed}")
+
+    def __call__(self, world):
+        rng = self.rng
+        if rng.random() < 1.0 / 30.0:
+            world.hold_keys(rng.choice(_RANDOM_MOVES) + rng.choice(("", "j", "l")))
+        if rng.random() < 0.1:
+            world.fire()
+
+# a policy is a callable(world), or a class that is built with the match seed
+POLICIES = {"idle": idle_policy, "aim": aim_policy, "random": RandomPolicy}
+
+# ===================== HEADLESS RUNNER =====================
+def run_headless(ticks, seed=None, tick_hz=TICK_HZ, policy=aim_policy, stop_on_end=True, crosscheck=False,
+                 observer=None, recorder=None, levels=None, stress=0, perf=None):
+    """Run one match for `ticks` fixed steps on a ManualClock; return a stats dict.
+
+    `observer(world)`, if given, runs after every advance (stat collection).
+    `recorder(world)`, if given, builds a replay.Recorder for the match.
+    `levels` replaces the default level set (see levels.load_levels).
+    `stress` > 0 plays stress mode with that many enemies instead.
+    `perf`, a perf.FrameTimers, gets one row per tick of update stage times.
+    """
+    clock = ManualClock()
+    world = World(seed=seed, clock=clock, tick_hz=tick_hz, levels=levels)
+    world.collision_crosscheck = crosscheck or COLLISION_CROSSCHECK
+    if stress:
+        world.set_stress(stress)
+    world.set_perf(perf)
+    if recorder is not None:
+        world.recorder = recorder(world)
+    if isinstance(policy, type):
+        policy = policy(world.seed)
+    world.advance()
+    t0 = time.perf_counter()
+    n = 0
+    while n < ticks:
+        if stop_on_end and world.frozen:
+            break
+        policy(world)
+        clock.advance(world.tick_ms)
+        n += world.advance()
+        if perf is not None:
+            perf.end_frame()
+        if observer is not None:
+            observer(world)
+    elapsed = time.perf_counter() - t0
+    if world.recorder is not None:
+        world.recorder.close(world)
+    return dict(
+        ticks=n,
+        seconds=elapsed,
+        ticks_per_sec=(n / elapsed) if elapsed > 0 else float("inf"),
+        sim_ms=world.time_ms,
+        level=world.level_index,
+        won=world.game_win_freeze,
+        lost=world.game_over_freeze,
+        hits_taken=world.player_hits_taken,
+        seed=world.seed,
+    )
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Battle Tanks headless simulation runner")
+    ap.add_argument("--headless", action="store_true", help="accepted for parity with the game entry point")
+    ap.add_argument("--ticks", type=int, default=10000)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--hz", type=float, default=TICK_HZ, help="simulation ticks per second")
+    ap.add_argument("--policy", choices=sorted(POLICIES), default="aim")
+    ap.add_argument("--no-stop", action="store_true", help="keep ticking after the match ends")
+    ap.add_argument("--crosscheck", action="store_true", help="verify grid collisions against brute force")
+    ap.add_argument("--record", metavar="PATH", help="write a replay of the match (see replay.py)")
+    ap.add_argument("--levels", metavar="PATH", help="level definitions to play (default: levels.json)")
+    ap.add_argument("--stress", type=int, default=0, metavar="N", help="stress mode: N enemies in rings, all firing")
+    ap.add_argument("--perf-csv", metavar="PATH", help="time each update stage; one CSV row per tick")
+    args = ap.parse_args(argv)
+    perf = None
+    if args.perf_csv:
+        from perf import FrameTimers, SIM_STAGES
+        perf = FrameTimers(SIM_STAGES)
+        perf.open_csv(args.perf_csv)
+    levels = load_levels(args.levels) if args.levels else None
+    recorder = None
+    if args.record:
+        from replay import Recorder
+        recorder = lambda w: Recorder(args.record, w)
+    r = run_headless(args.ticks, seed=args.seed, tick_hz=args.hz, policy=POLICIES[args.policy], stop_on_end=not args.no_stop,
+                     crosscheck=args.crosscheck, recorder=recorder, levels=levels,
+                     stress=args.stress, perf=perf)
+    outcome = "WON" if r["won"] else ("LOST" if r["lost"] else "RUNNING")
+    print(f"ticks={r['ticks']} sim_ms={r['sim_ms']:.0f} wall_s={r['seconds']:.3f} ticks/s={r['ticks_per_sec']:.0f}")
+    print(f"seed={r['seed']} level={r['level']} hits={r['hits_taken']}/{PLAYER_MAX_HITS} outcome={outcome}")
+    if perf is not None:
+        perf.close_csv()
+        print("stage ms/tick (mean, p99 over the last %d ticks):" % min(perf.n, perf.capacity))
+        for stage, mean, p99 in perf.summary()[:-1]:
+            print(f"  {stage:<12} {mean:8.4f} {p99:8.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# Battle Tanks — balance.py --param parsing
+#   python -m pytest -q
+import argparse
+import pytest
+from balance import parse_param
+
+@pytest.mark.parametrize("spec", ["GRID_LENGTH=600", "TICK_HZ=120", "OWNER_FB=2"])
+def test_constants_read_at_import_are_refused(spec):
+    with pytest.raises(argparse.ArgumentTypeError, match="half apply"):
+        parse_param(spec)
+
+def test_plain_constants_and_level_fields_sweep():
+    assert parse_param("FB_HP=15,30")[1] == [15, 30]
+    assert parse_param("level3.spawn_speed=0.45")[1] == [0.45]
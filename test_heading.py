@@ -0,0 +1,68 @@
+# Battle Tanks — heading vectors vs the degree math they replaced
+#   python -m pytest -q
+import math
+import numpy as np
+import pytest
+from heading import heading, toward, rotate, rotations, rel_deg, lerp, yaw_deg
+from steering import steer
+from tank_sim import rad, ang_norm
+
+ANGLES = (0.0, 1.4, 12.0, -18.0, 89.9, 90.0, 135.5, 180.0, -179.3, 271.0, 359.9, 725.0)
+TOL = 1e-9
+
+def test_heading_matches_rad():
+    for a in ANGLES:
+        assert heading(a) == (math.cos(rad(a)), math.sin(rad(a)))
+
+@pytest.mark.parametrize("a", ANGLES)
+@pytest.mark.parametrize("b", ANGLES)
+def test_rotate_adds_angles(a, b):
+    hx, hy = rotate(*heading(a), *heading(b))
+    ex, ey = heading(a + b)
+    assert abs(hx - ex) < TOL and abs(hy - ey) < TOL
+
+@pytest.mark.parametrize("a", ANGLES)
+@pytest.mark.parametrize("b", ANGLES)
+def test_rel_deg_is_normalised_difference(a, b):
+    want = ang_norm(b - a)
+    got = rel_deg(*heading(a), 3.0 * math.cos(rad(b)), 3.0 * math.sin(rad(b)))
+    # +-180 are the same turn
+    assert abs(ang_norm(got - want)) < TOL
+
+def test_rotations_follow_their_angles():
+    assert rotations((0.0, 12.0, -12.0)) == (heading(0.0), heading(12.0), heading(-12.0))
+    assert rotations((0.0, 40.0, -40.0)) == (heading(0.0), heading(40.0), heading(-40.0))
+
+def test_yaw_deg_round_trip():
+    for a in ANGLES:
+        assert abs(ang_norm(yaw_deg(*heading(a)) - a)) < TOL
+
+def test_toward():
+    hx, hy = toward(-30.0, 40.0)
+    assert abs(hx + 0.6) < TOL and abs(hy - 0.8) < TOL
+    assert toward(0.0, 0.0) == (1.0, 0.0)
+
+def test_lerp_endpoints_and_half_turn():
+    p, c = heading(10.0), heading(50.0)
+    assert lerp(*p, *c, 0.0) == pytest.approx(p)
+    assert lerp(*p, *c, 1.0) == pytest.approx(c)
+    assert yaw_deg(*lerp(*p, *c, 0.5)) == pytest.approx(30.0)
+    assert lerp(1.0, 0.0, -1.0, 0.0, 0.5) == (-1.0, 0.0)
+
+def test_steer_matches_degree_yaw():
+    rng = np.random.default_rng(7)
+    n = 64
+    x, y = rng.uniform(-500, 500, n), rng.uniform(-500, 500, n)
+    x[0] = y[0] = 0.0                       # on top of the target: faces +X
+    speed = rng.uniform(0.5, 2.0, n)
+    hx, hy = np.zeros(n), np.zeros(n)
+    nx, ny = x.copy(), y.copy()
+    steer(nx, ny, hx, hy, speed, 0.0, 0.0, 1.25, standoff_r=200.0, deadband=10.0, back_scale=0.5)
+    yaw = np.degrees(np.arctan2(0.0 - y, 0.0 - x))
+    assert np.allclose(hx, np.cos(np.radians(yaw)), atol=TOL)
+    assert np.allclose(hy, np.sin(np.radians(yaw)), atol=TOL)
+    d = np.hypot(x, y)
+    step = speed * 1.25
+    move = np.where(d > 210.0, step, np.where(d < 190.0, -0.5 * step, 0.0))
+    assert np.allclose(nx, x + np.cos(np.radians(yaw)) * move, atol=TOL)
+    assert np.allclose(ny, y + np.sin(np.radians(yaw)) * move, atol=TOL)
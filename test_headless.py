@@ -0,0 +1,26 @@
+# Battle Tanks — pinned headless match outcomes
+# A refactor that should not change gameplay must keep these exactly; a
+# deliberate gameplay change updates them in the same commit, with a note.
+#   python -m pytest -q
+import pytest
+import tank_sim
+
+# (policy, seed) -> (ticks, level, lost, hits_taken, basic_kills, final player x, y)
+PINNED = {
+    ("aim", 1): (2968, 4, True, 10, 0, 520.0, -520.0),
+    ("aim", 2): (1020, 1, True, 10, 5, 0.0, 0.0),
+    ("aim", 3): (1905, 2, True, 10, 7, 520.0, 520.0),
+    ("aim", 4): (2873, 4, True, 10, 0, -520.0, 520.0),
+    ("aim", 8): (2893, 3, True, 10, 10, 520.0, 520.0),
+    ("random", 1): (2377, 1, True, 10, 5, -348.103, 312.018),
+    ("random", 2): (1705, 1, True, 10, 5, -222.586, 68.149),
+}
+
+@pytest.mark.parametrize("policy, seed", sorted(PINNED))
+def test_pinned_outcome(policy, seed):
+    last = []
+    r = tank_sim.run_headless(100000, seed=seed, policy=tank_sim.POLICIES[policy], observer=last.append)
+    world = last[-1]
+    got = (r["ticks"], r["level"], r["lost"], r["hits_taken"], world.basic_kills,
+           round(world.tank_pos[0], 3), round(world.tank_pos[1], 3))
+    assert got == PINNED[policy, seed]